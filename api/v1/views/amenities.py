@@ -5,20 +5,16 @@ Objects that handles all default RestFul API actions for Amenities
 from models.amenity import Amenity
 from models import storage
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 from flask import abort, jsonify, request
 
 
 @app_views.route("/amenities", strict_slashes=False)
 def get_amenities():
     """
-    Gets list of all amenities
+    Gets list of all amenities, a page of them with limit and cursor
     """
-    all_amenities = storage.all(Amenity).values()
-    list_of_amenities = []
-
-    for amenity in all_amenities:
-        list_of_amenities.append(amenity.to_dict())
-    return jsonify(list_of_amenities)
+    return paginate(storage.query(Amenity))
 
 
 @app_views.route("/amenities/<amenity_id>", strict_slashes=False)
@@ -95,8 +91,8 @@ def update_amenity(amenity_id):
         abort(404)
 
     data = request.get_json()
-    for key, value in data.items():
-        if key not in ignore:
-            setattr(amenity, key, value)
-    storage.save()
+    with storage.transaction():
+        for key, value in data.items():
+            if key not in ignore:
+                setattr(amenity, key, value)
     return jsonify(amenity.to_dict()), 200
@@ -8,18 +8,19 @@ from models.state import State
 from models.city import City
 from models import storage
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 
 
 @app_views.route("/states/<state_id>/cities", strict_slashes=False)
 def get_cities_by_states(state_id):
     """
-    Gets list of all cities of a state
+    Gets list of all cities of a state, a page of them with limit and
+        cursor
     """
     state = storage.get(State, state_id)
     if not state:
         return abort(404)
-    cities = [city.to_dict() for city in state.cities]
-    return jsonify(cities)
+    return paginate(storage.query(City).filter(state_id=state.id))
 
 
 @app_views.route("/cities/<city_id>", strict_slashes=False)
@@ -104,10 +105,11 @@ def update_city(city_id):
         data = request.get_json()
         ignore_keys = ["id", "state_id", "created_at", "updated_at"]
 
-        for key, value in data.items():
-            if key not in ignore_keys:
-                setattr(city, key, value)
-        city.save()
+        with storage.transaction():
+            for key, value in data.items():
+                if key not in ignore_keys:
+                    setattr(city, key, value)
+            city.save()
         return jsonify(city.to_dict()), 200
     else:
         return abort(404)
@@ -3,7 +3,7 @@
 Create route on app_views
 """
 
-from flask import jsonify
+from flask import abort, jsonify
 from api.v1.views import app_views
 from models import storage
 
@@ -17,18 +17,40 @@ def api_status():
     return jsonify(response)
 
 
+@app_views.route("/status/pool")
+def get_pool_stats():
+    """
+    returns the statistics of the database connection pool, 404 without one
+    """
+    if not hasattr(storage, "pool_stats"):
+        abort(404)
+    return jsonify(storage.pool_stats())
+
+
+@app_views.route("/status/cache")
+def get_cache_stats():
+    """
+    returns the statistics of the query cache, 404 without one
+    """
+    stats = getattr(storage, "cache_stats", lambda: None)()
+    if stats is None:
+        abort(404)
+    return jsonify(stats)
+
+
 @app_views.route("/stats")
 def get_stats():
     """
     Creates endpoint that retrieves the number of each objects by type
     """
+    counts = storage.count_all()
     stats = {
-        "amenities": storage.count("Amenity"),
-        "cities": storage.count("City"),
-        "places": storage.count("Place"),
-        "users": storage.count("User"),
-        "reviews": storage.count("Review"),
-        "states": storage.count("State"),
+        "amenities": counts["Amenity"],
+        "cities": counts["City"],
+        "places": counts["Place"],
+        "users": counts["User"],
+        "reviews": counts["Review"],
+        "states": counts["State"],
     }
 
     return jsonify(stats)
@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""
+Pages the collections the API returns with the limit and cursor query
+arguments
+"""
+import base64
+from datetime import datetime
+import json
+from flask import abort, request, url_for
+from api.v1.views.streaming import stream, stream_query
+
+# most objects a page may hold
+max_limit = 1000
+# the collections are paged in this order, id telling apart the objects
+# created at the same time
+ordering = ("created_at", "id")
+
+
+def encode_cursor(values):
+    """returns the opaque cursor of the (created_at, id) of an object"""
+    created_at, obj_id = values
+    data = json.dumps([created_at.isoformat(), obj_id])
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """returns the (created_at, id) a cursor stands for, or None if it is
+    not a cursor"""
+    try:
+        data = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        created_at, obj_id = json.loads(data)
+        return datetime.fromisoformat(created_at), str(obj_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def paginate(query):
+    """returns the response streaming the objects of a storage query
+
+    Without limit and cursor arguments, every object is returned, as the
+    collections always were, fetched a page at a time. Otherwise at most
+    limit objects are returned, those created after the object the cursor
+    stands for, and the X-Next-Cursor and Link headers give the cursor
+    and the URL of the next page, unless it is the last one.
+    """
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    if limit is None and cursor is None:
+        return stream_query(query)
+    try:
+        limit = int(limit) if limit is not None else max_limit
+    except ValueError:
+        abort(400, description="Invalid limit")
+    if not 0 < limit <= max_limit:
+        abort(400, description="Invalid limit")
+    query = query.order_by(*ordering)
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if values is None:
+            abort(400, description="Invalid cursor")
+        query = query.after(*values)
+    # one more tells whether there is a next page
+    objs = query.limit(limit + 1).all()
+    response = stream(obj.to_dict() for obj in objs[:limit])
+    if len(objs) > limit:
+        next_cursor = encode_cursor(query.key_of(objs[limit - 1]))
+        url = url_for(request.endpoint, _external=True, limit=limit,
+                      cursor=next_cursor, **request.view_args)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = '<{}>; rel="next"'.format(url)
+    return response
@@ -1,12 +1,13 @@
 #!/usr/bin/python3
 """objects that handle all default RestFul API actions for Places"""
-from models.state import State
 from models.city import City
 from models.place import Place
 from models.user import User
 from models.amenity import Amenity
 from models import storage
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
+from api.v1.views.streaming import stream, stream_query
 from flask import abort, jsonify, request
 
 
@@ -15,15 +16,14 @@ def get_places(city_id):
     """
     Retrieves the list of all Place objects of a City
     If the city_id is not linked to any City object, raise a 404 error
+    A page of them is returned with the limit and cursor arguments
     """
     city = storage.get(City, city_id)
 
     if not city:
         abort(404)
 
-    places = [place.to_dict() for place in city.places]
-
-    return jsonify(places)
+    return paginate(storage.query(Place).filter(city_id=city.id))
 
 
 @app_views.route("/places/<place_id>", strict_slashes=False)
@@ -123,10 +123,10 @@ def update_place(place_id):
 
     ignore = ["id", "user_id", "city_id", "created_at", "updated_at"]
 
-    for key, value in data.items():
-        if key not in ignore:
-            setattr(place, key, value)
-    storage.save()
+    with storage.transaction():
+        for key, value in data.items():
+            if key not in ignore:
+                setattr(place, key, value)
     return jsonify(place.to_dict()), 200
 
 
@@ -148,44 +148,36 @@ def places_search():
         amenities = data.get("amenities", None)
 
     if not data or not len(data) or (not states and not cities and not amenities):
-        places = storage.all(Place).values()
-        list_places = []
-        for place in places:
-            list_places.append(place.to_dict())
-        return jsonify(list_places)
+        return stream_query(storage.query(Place))
+
+    query = storage.query(Place)
+    if amenities:
+        # one query loads the amenities of every place found
+        query = query.load("amenities")
 
     list_places = []
-    if states:
-        states_obj = [storage.get(State, s_id) for s_id in states]
-        for state in states_obj:
-            if state:
-                for city in state.cities:
-                    if city:
-                        for place in city.places:
-                            list_places.append(place)
-
-    if cities:
-        city_obj = [storage.get(City, c_id) for c_id in cities]
-        for city in city_obj:
-            if city:
-                for place in city.places:
-                    if place not in list_places:
-                        list_places.append(place)
+    if states or cities:
+        city_ids = list(cities or [])
+        if states:
+            city_ids += [city.id for city in
+                         storage.query(City).filter(state_id__in=states)]
+        list_places = query.filter(city_id__in=city_ids).all()
 
     if amenities:
         if not list_places:
-            list_places = storage.all(Place).values()
-        amenities_obj = [storage.get(Amenity, a_id) for a_id in amenities]
+            list_places = query.all()
+        amenity_ids = set(amenities)
         list_places = [
             place
             for place in list_places
-            if all([am in place.amenities for am in amenities_obj])
+            if amenity_ids <= {am.id for am in place.amenities}
         ]
 
-    places = []
-    for p in list_places:
-        d = p.to_dict()
-        d.pop("amenities", None)
-        places.append(d)
+    def places():
+        """yields the dicts of the places found, without amenities"""
+        for p in list_places:
+            d = p.to_dict()
+            d.pop("amenities", None)
+            yield d
 
-    return jsonify(places)
+    return stream(places())
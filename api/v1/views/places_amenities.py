@@ -2,9 +2,8 @@
 """objects that handle all default RestFul API actions for Place - Amenity"""
 from models.place import Place
 from models.amenity import Amenity
-from models import storage
+from models import storage, storage_t
 from api.v1.views import app_views
-from os import environ
 from flask import abort, jsonify, make_response, request
 
 
@@ -18,7 +17,7 @@ def get_place_amenities(place_id):
     if not place:
         abort(404)
 
-    if environ.get("HBNB_TYPE_STORAGE") == "db":
+    if storage_t == "db":
         amenities = [amenity.to_dict() for amenity in place.amenities]
     else:
         amenities = [
@@ -48,16 +47,17 @@ def delete_place_amenity(place_id, amenity_id):
     if not amenity:
         abort(404)
 
-    if environ.get("HBNB_TYPE_STORAGE") == "db":
-        if amenity not in place.amenities:
-            abort(404)
-        place.amenities.remove(amenity)
-    else:
-        if amenity_id not in place.amenity_ids:
-            abort(404)
-        place.amenity_ids.remove(amenity_id)
+    with storage.transaction():
+        if storage_t == "db":
+            if amenity not in place.amenities:
+                abort(404)
+            place.amenities.remove(amenity)
+        else:
+            if amenity_id not in place.amenity_ids:
+                abort(404)
+            place.amenity_ids = [a_id for a_id in place.amenity_ids
+                                 if a_id != amenity_id]
 
-    storage.save()
     return make_response(jsonify({}), 200)
 
 
@@ -78,16 +78,16 @@ def create_place_amenity(place_id, amenity_id):
     if not amenity:
         abort(404)
 
-    if environ.get("HBNB_TYPE_STORAGE") == "db":
-        if amenity in place.amenities:
-            return make_response(jsonify(amenity.to_dict()), 200)
-        else:
-            place.amenities.append(amenity)
-    else:
-        if amenity_id in place.amenity_ids:
-            return make_response(jsonify(amenity.to_dict()), 200)
+    with storage.transaction():
+        if storage_t == "db":
+            if amenity in place.amenities:
+                return make_response(jsonify(amenity.to_dict()), 200)
+            else:
+                place.amenities.append(amenity)
         else:
-            place.amenity_ids.append(amenity_id)
+            if amenity_id in place.amenity_ids:
+                return make_response(jsonify(amenity.to_dict()), 200)
+            else:
+                place.amenity_ids = place.amenity_ids + [amenity_id]
 
-    storage.save()
     return make_response(jsonify(amenity.to_dict()), 201)
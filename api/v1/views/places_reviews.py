@@ -5,6 +5,7 @@ from models.place import Place
 from models.user import User
 from models import storage
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 from flask import abort, jsonify, make_response, request
 
 
@@ -13,15 +14,14 @@ def get_reviews(place_id):
     """
     Retrieves the list of all Review objects of a Place
     If the place_id is not linked to any Place object, raise a 404 error
+    A page of them is returned with the limit and cursor arguments
     """
     place = storage.get(Place, place_id)
 
     if not place:
         abort(404)
 
-    reviews = [review.to_dict() for review in place.reviews]
-
-    return jsonify(reviews)
+    return paginate(storage.query(Review).filter(place_id=place.id))
 
 
 @app_views.route("/reviews/<review_id>", methods=["GET"], strict_slashes=False)
@@ -123,8 +123,8 @@ def put_review(review_id):
     ignore = ["id", "user_id", "place_id", "created_at", "updated_at"]
 
     data = request.get_json()
-    for key, value in data.items():
-        if key not in ignore:
-            setattr(review, key, value)
-    storage.save()
+    with storage.transaction():
+        for key, value in data.items():
+            if key not in ignore:
+                setattr(review, key, value)
     return jsonify(review.to_dict()), 200
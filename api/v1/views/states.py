@@ -7,16 +7,15 @@ from flask import jsonify, abort, make_response, request
 from models.state import State
 from models import storage
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 
 
 @app_views.route("/states", strict_slashes=False)
 def get_all_states():
     """
-    Gets list of all states
+    Gets list of all states, a page of them with limit and cursor
     """
-    states = storage.all(State).values()
-    state_list = [state.to_dict() for state in states]
-    return jsonify(state_list)
+    return paginate(storage.query(State))
 
 
 @app_views.route("/states/<state_id>", strict_slashes=False)
@@ -96,8 +95,8 @@ def update_state(state_id):
     ignore = ["id", "created_at", "updated_at"]
 
     data = request.get_json()
-    for key, value in data.items():
-        if key not in ignore:
-            setattr(state, key, value)
-    storage.save()
+    with storage.transaction():
+        for key, value in data.items():
+            if key not in ignore:
+                setattr(state, key, value)
     return make_response(jsonify(state.to_dict()), 200)
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Streams the collections the API returns instead of building them whole
+"""
+from flask import Response, current_app, request, stream_with_context
+
+# objects fetched from storage at once by the collections streamed whole
+page_size = 500
+
+
+def wants_ndjson():
+    """returns whether the client prefers one JSON object per line to a
+    JSON array"""
+    best = request.accept_mimetypes.best_match(
+        ["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
+
+
+def stream(records):
+    """returns the response streaming the dicts of the iterable records
+    as a JSON array formatted as jsonify() would, or as NDJSON if the
+    client asks for it; a record is serialized once it is the next one
+    to send, so that the whole collection is never held in memory"""
+    dumps = current_app.json.dumps
+    compact = current_app.json.compact
+    pretty = compact is False or (compact is None and current_app.debug)
+
+    def ndjson():
+        """yields one line of compact JSON per record"""
+        for record in records:
+            yield dumps(record, separators=(",", ":")) + "\n"
+
+    def array():
+        """yields the JSON array of the records, one element at a time"""
+        separator = "[\n  " if pretty else "["
+        for record in records:
+            if pretty:
+                data = dumps(record, indent=2).replace("\n", "\n  ")
+            else:
+                data = dumps(record, separators=(",", ":"))
+            yield separator + data
+            separator = ",\n  " if pretty else ","
+        if separator[0] == "[":
+            yield "[]\n"
+        else:
+            yield "\n]\n" if pretty else "]\n"
+
+    if wants_ndjson():
+        return Response(stream_with_context(ndjson()),
+                        mimetype="application/x-ndjson")
+    return Response(stream_with_context(array()),
+                    mimetype=current_app.json.mimetype)
+
+
+def stream_query(query):
+    """returns the response streaming the objects of a storage query,
+    fetched page_size at a time"""
+    return stream(obj.to_dict() for obj in query.iter(page_size))
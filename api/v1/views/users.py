@@ -5,20 +5,16 @@ Objects that handles all default RestFul API actions for Users
 from models.user import User
 from models import storage
 from api.v1.views import app_views
+from api.v1.views.pagination import paginate
 from flask import abort, jsonify, request
 
 
 @app_views.route("/users", strict_slashes=False)
 def get_users():
     """
-    Gets list of all users
+    Gets list of all users, a page of them with limit and cursor
     """
-    all_users = storage.all(User).values()
-    list_of_users = []
-
-    for user in all_users:
-        list_of_users.append(user.to_dict())
-    return jsonify(list_of_users)
+    return paginate(storage.query(User))
 
 
 @app_views.route("/users/<user_id>", strict_slashes=False)
@@ -98,8 +94,8 @@ def update_user(user_id):
         abort(404)
 
     data = request.get_json()
-    for key, value in data.items():
-        if key not in ignore_keys:
-            setattr(user, key, value)
-    storage.save()
+    with storage.transaction():
+        for key, value in data.items():
+            if key not in ignore_keys:
+                setattr(user, key, value)
     return jsonify(user.to_dict()), 200
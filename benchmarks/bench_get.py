@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""
+Measures storage.get() latency as the Place table grows
+
+Usage: python3 -m benchmarks.bench_get [size ...]
+Runs against the engine selected by HBNB_TYPE_STORAGE. In file mode the
+objects are only kept in memory; in db and sqlite modes they are committed,
+so point HBNB_MYSQL_DB or HBNB_SQLITE_PATH at a scratch database.
+"""
+
+import models
+import random
+import sys
+import timeit
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+
+def seed(count):
+    """adds Places to storage until it holds count of them"""
+    missing = count - models.storage.count(Place)
+    state = State(name="Bench")
+    city = City(name="Bench", state_id=state.id)
+    user = User(email="bench@hbnb.io", password="bench")
+    for obj in (state, city, user):
+        models.storage.new(obj)
+    for i in range(missing):
+        models.storage.new(Place(name="place_{}".format(i), city_id=city.id,
+                                 user_id=user.id))
+    if models.storage_t == "db":
+        models.storage.save()
+
+
+def bench(count, lookups=2000):
+    """returns the mean latency of one get() in microseconds"""
+    seed(count)
+    ids = [obj.id for obj in models.storage.all(Place).values()]
+    sample = [random.choice(ids) for _ in range(lookups)]
+    timer = timeit.default_timer
+    start = timer()
+    for place_id in sample:
+        models.storage.get(Place, place_id)
+    return (timer() - start) / lookups * 1e6
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1000, 10000, 100000]
+    print("{:>10}  {:>12}".format("places", "get() us"))
+    for size in sorted(sizes):
+        print("{:>10}  {:>12.2f}".format(size, bench(size)))
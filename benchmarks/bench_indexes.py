@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+"""
+Measures the relationship loads of the database engines with and without
+the indexes the models declare
+
+Usage: python3 -m benchmarks.bench_indexes [places [loads]]
+A SQLite database is seeded in a temporary directory with places Places,
+their Cities, States, Users and two Reviews each. The loads are timed once
+with every index dropped, as the tables were before the models declared
+them, then again with the indexes created. MySQL indexes the foreign keys
+by itself, so there only the lookup columns would be scans without them.
+"""
+
+from datetime import datetime
+import os
+import random
+import sys
+import tempfile
+import timeit
+import uuid
+
+# Cities per State, Places per City and Places per User
+cities_per_state = 20
+places_per_city = 20
+places_per_user = 10
+
+
+def rows(count, **columns):
+    """returns count rows of a table, each with a new id, the dates of now
+    and the values of columns, functions of the number of the row"""
+    now = datetime.utcnow()
+    return [dict({key: value(i) for key, value in columns.items()},
+                 id=str(uuid.uuid4()), created_at=now, updated_at=now)
+            for i in range(count)]
+
+
+def seed(engine, places):
+    """inserts places Places and the objects they belong to, and returns
+    the rows inserted, by class"""
+    from models.city import City
+    from models.place import Place
+    from models.review import Review
+    from models.state import State
+    from models.user import User
+
+    cities = max(1, places // places_per_city)
+    states = rows(max(1, cities // cities_per_state),
+                  name=lambda i: "state_{}".format(i))
+    cities = rows(cities, name=lambda i: "city_{}".format(i),
+                  state_id=lambda i: random.choice(states)["id"])
+    users = rows(max(1, places // places_per_user),
+                 email=lambda i: "user_{}@hbnb.io".format(i),
+                 password=lambda i: "pwd")
+    places = rows(places, name=lambda i: "place_{}".format(i),
+                  city_id=lambda i: random.choice(cities)["id"],
+                  user_id=lambda i: random.choice(users)["id"])
+    reviews = rows(2 * len(places), text=lambda i: "review",
+                   place_id=lambda i: random.choice(places)["id"],
+                   user_id=lambda i: random.choice(users)["id"])
+    tables = [(State, states), (City, cities), (User, users),
+              (Place, places), (Review, reviews)]
+    with engine.begin() as connection:
+        for cls, table in tables:
+            connection.execute(cls.__table__.insert(), table)
+    return {cls: table for cls, table in tables}
+
+
+def loads(seeded):
+    """returns the (name, rows, function of one of the rows) of each load
+    timed"""
+    import models
+    from models.city import City
+    from models.place import Place
+    from models.state import State
+    from models.user import User
+
+    storage = models.storage
+    return [
+        ("State.cities", seeded[State],
+         lambda row: storage.get(State, row["id"]).cities),
+        ("City.places", seeded[City],
+         lambda row: storage.get(City, row["id"]).places),
+        ("Place.reviews", seeded[Place],
+         lambda row: storage.get(Place, row["id"]).reviews),
+        ("User.places", seeded[User],
+         lambda row: storage.get(User, row["id"]).places),
+        ("User.reviews", seeded[User],
+         lambda row: storage.get(User, row["id"]).reviews),
+        ("User by email", seeded[User],
+         lambda row: storage.query(User).filter(email=row["email"]).first()),
+        ("State by name", seeded[State],
+         lambda row: storage.query(State).filter(name=row["name"]).first()),
+    ]
+
+
+def bench(load, table, count):
+    """returns the mean milliseconds of load on count random rows, each in
+    a new session so that no relationship is already loaded"""
+    import models
+
+    total = 0
+    for row in random.choices(table, k=count):
+        start = timeit.default_timer()
+        load(row)
+        total += timeit.default_timer() - start
+        models.storage.close()
+    return total / count * 1000
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["HBNB_TYPE_STORAGE"] = "sqlite"
+        os.environ["HBNB_SQLITE_PATH"] = os.path.join(tmp, "hbnb.db")
+        os.environ.pop("HBNB_ENV", None)
+        import models
+        from models.base_model import Base
+
+        engine = models.storage._DBStorage__engine
+        seeded = seed(engine, size)
+        indexes = [index for table in Base.metadata.sorted_tables
+                   for index in table.indexes]
+        timed = loads(seeded)
+        for index in indexes:
+            index.drop(engine)
+        before = [bench(load, table, count) for name, table, load in timed]
+        for index in indexes:
+            index.create(engine)
+        after = [bench(load, table, count) for name, table, load in timed]
+        print("{} places, mean ms of {} loads".format(size, count))
+        print("{:>14}  {:>10}  {:>10}".format("load", "no index",
+                                              "indexed"))
+        for (name, table, load), slow, fast in zip(timed, before, after):
+            print("{:>14}  {:>10.3f}  {:>10.3f}".format(name, slow, fast))
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+Measures the resident memory of FileStorage in paged mode
+
+Usage: python3 -m benchmarks.bench_paged [size [budget MiB ...]]
+A dataset of size objects is generated in a temporary directory, then
+loaded by a fresh process per mode: resident (every instance in memory),
+lazy, and paged with each budget. Each process reloads the file and reads
+random objects with get(); its RSS is sampled as the reads go on, so that
+the steady state of the paged mode can be compared with its budget. The
+budget caps the record pages only: the keys and indexes, which every mode
+holds, come on top of it.
+"""
+
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.bench_reload import generate
+
+# get() calls between two samples of the RSS, and samples taken
+reads = 20000
+samples = 5
+
+
+def rss():
+    """returns the current resident set size in MiB"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+
+
+def load(path, mode, budget):
+    """reloads path in mode, reads random objects and prints the reload
+    seconds, the RSS samples and the peak RSS in MiB"""
+    import models
+    from models.engine.file_storage import FileStorage, build
+    from models.engine.lazy_objects import LazyObjects, PagedObjects
+
+    storage = FileStorage()
+    FileStorage._FileStorage__file_path = path
+    if mode == "lazy":
+        FileStorage._FileStorage__objects = LazyObjects(build)
+    elif mode == "paged":
+        FileStorage._FileStorage__objects = PagedObjects(
+            build, budget=budget << 20)
+    start = time.perf_counter()
+    storage.reload()
+    elapsed = time.perf_counter() - start
+    keys = list(storage.all())
+    measures = [rss()]
+    for i in range(samples):
+        for key in random.sample(keys, min(reads, len(keys))):
+            name, obj_id = key.split(".")
+            storage.get(name, obj_id)
+        measures.append(rss())
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(elapsed, peak, *measures)
+
+
+def measure(path, mode, budget=0):
+    """returns the reload seconds, the peak and the RSS samples in MiB of
+    loading path in a new process"""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    env = dict(os.environ, PYTHONPATH=root)
+    env.pop("HBNB_TYPE_STORAGE", None)
+    with tempfile.TemporaryDirectory() as cwd:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_paged", "--load",
+             path, mode, str(budget)], cwd=cwd, env=env, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return [float(n) for n in out.split()]
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--load"]:
+        load(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit(0)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    budgets = [int(n) for n in sys.argv[2:]] or [16, 64]
+    runs = [("resident", 0), ("lazy", 0)]
+    runs += [("paged", budget) for budget in budgets]
+    print("{} objects, RSS in MiB after reload then every {} get()".format(
+        size, reads))
+    print("{:>8}  {:>10}  {:>8}  {:>8}  {}".format(
+        "mode", "budget MiB", "reload s", "peak", "RSS"))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "file.json")
+        generate(path, size)
+        for mode, budget in runs:
+            elapsed, peak, *measures = measure(path, mode, budget)
+            print("{:>8}  {:>10}  {:>8.2f}  {:>8.1f}  {}".format(
+                mode, budget or "-", elapsed, peak,
+                " ".join("{:.1f}".format(n) for n in measures)))
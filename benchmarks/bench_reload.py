@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""
+Measures the load time and peak memory of FileStorage.reload()
+
+Usage: python3 -m benchmarks.bench_reload [size ...]
+Each dataset is generated in a temporary directory and loaded by a fresh
+process, once with reload(), once with reload() in lazy mode, which builds
+no instance, and once with the former json.load() of the whole file, so
+that every peak RSS is measured on its own.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+# share of each class in the generated datasets
+mix = (("State", 1), ("City", 4), ("User", 10), ("Amenity", 1),
+       ("Place", 24), ("Review", 60))
+
+
+def generate(path, size):
+    """writes a file.json of size objects to path, one record at a time"""
+    stamp = "2017-09-28T21:05:54.119427"
+    total = sum(share for name, share in mix)
+    with open(path, "w") as f:
+        f.write("{")
+        separator = ""
+        for name, share in mix:
+            for i in range(size * share // total):
+                obj_id = str(uuid.uuid4())
+                record = {"id": obj_id, "created_at": stamp,
+                          "updated_at": stamp, "name": "name_{}".format(i),
+                          "__class__": name}
+                f.write('{}"{}.{}": {}'.format(separator, name, obj_id,
+                                               json.dumps(record)))
+                separator = ", "
+        f.write("}")
+
+
+def load(path, mode):
+    """loads path into FileStorage and prints seconds and peak RSS in MiB"""
+    import models
+    from models.engine.file_storage import FileStorage, build
+    from models.engine.lazy_objects import LazyObjects
+
+    storage = FileStorage()
+    FileStorage._FileStorage__file_path = path
+    if mode == "lazy":
+        FileStorage._FileStorage__objects = LazyObjects(build)
+    start = time.perf_counter()
+    if mode in ("stream", "lazy"):
+        storage.reload()
+    else:
+        with open(path) as f:
+            jo = json.load(f)
+        storage._FileStorage__apply(jo.items(), ())
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(elapsed, peak, storage.count())
+
+
+def measure(path, mode):
+    """returns the (seconds, peak MiB) of loading path in a new process"""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    env = dict(os.environ, PYTHONPATH=root)
+    env.pop("HBNB_TYPE_STORAGE", None)
+    with tempfile.TemporaryDirectory() as cwd:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_reload", "--load",
+             path, mode], cwd=cwd, env=env, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    elapsed, peak, count = out.split()
+    return float(elapsed), float(peak)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--load"]:
+        load(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+    sizes = [int(n) for n in sys.argv[1:]] or [100000, 1000000, 5000000]
+    modes = ("stream", "lazy", "json")
+    print("{:>10}".format("objects") +
+          "".join("  {:>8} s".format(mode) for mode in modes) +
+          "".join("  {:>8} MiB".format(mode) for mode in modes))
+    for size in sorted(sizes):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "file.json")
+            generate(path, size)
+            results = [measure(path, mode) for mode in modes]
+        print("{:>10}".format(size) +
+              "".join("  {:>10.2f}".format(r[0]) for r in results) +
+              "".join("  {:>12.1f}".format(r[1]) for r in results))
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Measures FileStorage.save() as the number of changed objects grows
+
+Usage: python3 -m benchmarks.bench_save [size [changes ...]]
+Size States are saved once to a file in a temporary directory, then
+changes of them are renamed before each save. Every save is timed with the
+cache of encoded records, turned on by HBNB_FILE_ENCODED_CACHE=1, which
+encodes only the changed objects again, and without it, the default,
+encoding all the objects.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+# saves timed for each number of changes, the best one is kept
+repeat = 3
+
+
+def bench(storage, states, changes, cached):
+    """returns the best seconds of a save after changes renames"""
+    from models.engine.file_storage import FileStorage
+
+    best = None
+    for i in range(repeat):
+        for state in random.sample(states, changes):
+            state.name = "renamed_{}".format(i)
+        FileStorage._FileStorage__encoded_cache = cached
+        start = timeit.default_timer()
+        storage.save()
+        elapsed = timeit.default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    os.environ.pop("HBNB_TYPE_STORAGE", None)
+    from models.engine.file_storage import FileStorage
+    from models.state import State
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    counts = [int(n) for n in sys.argv[2:]] or [0, 1, 100, 10000, size]
+    with tempfile.TemporaryDirectory() as tmp:
+        FileStorage._FileStorage__file_path = os.path.join(tmp, "file.json")
+        FileStorage._FileStorage__objects = {}
+        storage = FileStorage()
+        states = [State(name="state_{}".format(i)) for i in range(size)]
+        for state in states:
+            storage.new(state)
+        storage.save()
+        print("{} objects, best of {} saves".format(size, repeat))
+        print("{:>10}  {:>10}  {:>10}".format("changes", "cached s",
+                                              "full s"))
+        for changes in counts:
+            changes = min(changes, size)
+            cached = bench(storage, states, changes, True)
+            full = bench(storage, states, changes, False)
+            print("{:>10}  {:>10.3f}  {:>10.3f}".format(changes, cached,
+                                                        full))
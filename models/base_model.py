@@ -27,25 +27,37 @@ class BaseModel:
         updated_at = Column(DateTime, default=datetime.utcnow)
 
     def __init__(self, *args, **kwargs):
-        """Initialization of the base model"""
+        """Initialization of the base model; the attributes are set without
+        reporting them to the storage, which cannot hold the instance yet"""
+        assign = object.__setattr__
         if kwargs:
             for key, value in kwargs.items():
                 if key != "__class__":
-                    setattr(self, key, value)
+                    assign(self, key, value)
             if kwargs.get("created_at", None) and type(self.created_at) is str:
-                self.created_at = datetime.strptime(kwargs["created_at"], time)
-            else:
-                self.created_at = datetime.utcnow()
+                assign(self, "created_at",
+                       datetime.strptime(kwargs["created_at"], time))
+            elif type(kwargs.get("created_at", None)) is not datetime:
+                assign(self, "created_at", datetime.utcnow())
             if kwargs.get("updated_at", None) and type(self.updated_at) is str:
-                self.updated_at = datetime.strptime(kwargs["updated_at"], time)
-            else:
-                self.updated_at = datetime.utcnow()
+                assign(self, "updated_at",
+                       datetime.strptime(kwargs["updated_at"], time))
+            elif type(kwargs.get("updated_at", None)) is not datetime:
+                assign(self, "updated_at", datetime.utcnow())
             if kwargs.get("id", None) is None:
-                self.id = str(uuid.uuid4())
+                assign(self, "id", str(uuid.uuid4()))
         else:
-            self.id = str(uuid.uuid4())
-            self.created_at = datetime.utcnow()
-            self.updated_at = self.created_at
+            assign(self, "id", str(uuid.uuid4()))
+            assign(self, "created_at", datetime.utcnow())
+            assign(self, "updated_at", self.created_at)
+
+    if models.storage_t != "db":
+        def __setattr__(self, name, value):
+            """sets an attribute and lets the storage reindex the instance"""
+            had = name in self.__dict__
+            old = getattr(self, name, None)
+            super().__setattr__(name, value)
+            models.storage.attribute_changed(self, name, old, had)
 
     def __str__(self):
         """String representation of the BaseModel class"""
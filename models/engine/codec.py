@@ -0,0 +1,277 @@
+#!/usr/bin/python3
+"""
+Contains the codecs FileStorage reads and writes its snapshot file with
+
+Usage: ./models/engine/codec.py <source> <destination> [json | binary]
+       [zlib | bz2 | lzma]
+converts a snapshot file to the given codec, JSON by default
+"""
+
+import bz2
+from datetime import datetime, timedelta
+import io
+import json
+import lzma
+import re
+import struct
+import sys
+import zlib
+
+# format of the created_at and updated_at strings of the records
+time = "%Y-%m-%dT%H:%M:%S.%f"
+# datetimes are stored by the binary codec as microseconds since EPOCH
+EPOCH = datetime(1970, 1, 1)
+# whitespace allowed between JSON tokens
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_records(f, chunk_size=1 << 20):
+    """yields the (key, record) pairs of the JSON object in the file f one
+    at a time, holding no more than one record and one chunk in memory"""
+    scan = json.JSONDecoder().scan_once
+    skip = WHITESPACE.match
+    buf = ""
+    eof = False
+    while not eof:
+        chunk = f.read(chunk_size)
+        buf += chunk
+        eof = not chunk
+        pos = skip(buf).end()
+        if pos < len(buf):
+            break
+    if buf[pos:pos + 1] != "{":
+        raise ValueError("expected a JSON object")
+    pos += 1
+    while True:
+        pos = skip(buf, pos).end()
+        char = buf[pos:pos + 1]
+        try:
+            if char == "}":
+                return
+            if char == ",":
+                pos += 1
+                continue
+            if char != '"':
+                raise ValueError("expected a key at {}".format(pos))
+            key, end = json.decoder.scanstring(buf, pos + 1)
+            end = skip(buf, end).end()
+            if buf[end] != ":":
+                raise ValueError("expected ':' after {!r}".format(key))
+            record, end = scan(buf, skip(buf, end + 1).end())
+            if end == len(buf) and not eof:
+                # the record may go on in the next chunk
+                raise IndexError(end)
+        except (ValueError, IndexError, StopIteration):
+            if eof:
+                raise ValueError("truncated JSON object")
+            # read on and parse the pair again from its start
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            continue
+        pos = end
+        yield key, record
+
+
+def to_json(value):
+    """serializes the datetimes a record may hold for json.dumps"""
+    if isinstance(value, datetime):
+        return value.strftime(time)
+    raise TypeError("{!r} is not JSON serializable".format(value))
+
+
+class JSONCodec:
+    """the JSON object of <class name>.id: record that file.json holds"""
+
+    name = "json"
+
+    def read(self, f):
+        """yields the (key, record) pairs of the binary file f"""
+        return iter_records(io.TextIOWrapper(f, encoding="utf-8"))
+
+    def write(self, f, records):
+        """writes the (key, record) pairs of records to the binary file f"""
+        self.write_encoded(f, (self.encode(key, record)
+                               for key, record in records))
+
+    def encode(self, key, record):
+        """returns the bytes of the pair key, record in the file"""
+        return "{}: {}".format(json.dumps(key), json.dumps(
+            record, default=to_json)).encode("utf-8")
+
+    def write_encoded(self, f, entries):
+        """writes the pairs encoded by encode() to the binary file f"""
+        f.write(b"{")
+        separator = b""
+        for data in entries:
+            f.write(separator)
+            f.write(data)
+            separator = b", "
+        f.write(b"}")
+
+
+class BinaryCodec:
+    """length-prefixed records behind a versioned header, with datetimes
+    stored as integers and an optional compressor
+
+    header: MAGIC, version, compressor id
+    record: JSON length, key length, created_at, updated_at, key, JSON of
+            the other attributes
+    """
+
+    name = "binary"
+    MAGIC = b"HBNB"
+    VERSION = 1
+    HEADER = struct.Struct(">4sBB")
+    RECORD = struct.Struct(">IHqq")
+    # created_at or updated_at missing, or not a datetime
+    MISSING = -1 << 63
+    # compressor name: (id, compressor, decompressor)
+    compressors = {
+        None: (0, None, None),
+        "zlib": (1, zlib.compressobj, zlib.decompressobj),
+        "bz2": (2, bz2.BZ2Compressor, bz2.BZ2Decompressor),
+        "lzma": (3, lzma.LZMACompressor, lzma.LZMADecompressor),
+    }
+
+    def __init__(self, compressor=None):
+        """initializes a codec writing with compressor"""
+        if compressor not in self.compressors:
+            raise ValueError("unknown compressor {!r}".format(compressor))
+        self.compressor = compressor
+
+    def read(self, f, chunk_size=1 << 20):
+        """yields the (key, record) pairs of the binary file f"""
+        magic, version, compressor_id = self.HEADER.unpack(
+            f.read(self.HEADER.size))
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("not a version {} binary snapshot".format(
+                self.VERSION))
+        for id_, compressor, decompressor in self.compressors.values():
+            if id_ == compressor_id:
+                break
+        else:
+            raise ValueError("unknown compressor id {}".format(compressor_id))
+        if decompressor is not None:
+            decompress = decompressor().decompress
+        else:
+            def decompress(chunk):
+                """returns the uncompressed chunk as is"""
+                return chunk
+        unpack = self.RECORD.unpack_from
+        size = self.RECORD.size
+        buf = b""
+        pos = 0
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buf = buf[pos:] + decompress(chunk)
+            pos = 0
+            while len(buf) - pos >= size:
+                json_len, key_len, created, updated = unpack(buf, pos)
+                end = pos + size + key_len + json_len
+                if end > len(buf):
+                    break
+                start = pos + size
+                key = buf[start:start + key_len].decode("utf-8")
+                record = json.loads(buf[start + key_len:end])
+                if created != self.MISSING:
+                    record["created_at"] = EPOCH + timedelta(
+                        microseconds=created)
+                if updated != self.MISSING:
+                    record["updated_at"] = EPOCH + timedelta(
+                        microseconds=updated)
+                pos = end
+                yield key, record
+        if pos != len(buf):
+            raise ValueError("truncated binary snapshot")
+
+    def write(self, f, records):
+        """writes the (key, record) pairs of records to the binary file f"""
+        self.write_encoded(f, (self.encode(key, record)
+                               for key, record in records))
+
+    def encode(self, key, record):
+        """returns the bytes of the pair key, record in the file, before
+        compression"""
+        record = dict(record)
+        created = self.micros(record, "created_at")
+        updated = self.micros(record, "updated_at")
+        key = key.encode("utf-8")
+        data = json.dumps(record, default=to_json).encode("utf-8")
+        return self.RECORD.pack(len(data), len(key), created, updated) + \
+            key + data
+
+    def write_encoded(self, f, entries):
+        """writes the pairs encoded by encode() to the binary file f"""
+        compressor_id, compressor, decompressor = \
+            self.compressors[self.compressor]
+        f.write(self.HEADER.pack(self.MAGIC, self.VERSION, compressor_id))
+        compressor = compressor() if compressor is not None else None
+        for data in entries:
+            if compressor is not None:
+                data = compressor.compress(data)
+            f.write(data)
+        if compressor is not None:
+            f.write(compressor.flush())
+
+    def micros(self, record, attr):
+        """pops the datetime attr of record and returns it in microseconds
+        since EPOCH, or MISSING if the record holds no such datetime"""
+        value = record.get(attr)
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return self.MISSING
+        if not isinstance(value, datetime):
+            return self.MISSING
+        del record[attr]
+        delta = value - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 10 ** 6 + \
+            delta.microseconds
+
+
+codecs = {
+    "json": JSONCodec,
+    "binary": BinaryCodec,
+}
+
+
+def get(name="json", compressor=None):
+    """returns the codec called name, writing with compressor if binary"""
+    if name not in codecs:
+        raise ValueError("unknown codec {!r}".format(name))
+    if name == "binary":
+        return BinaryCodec(compressor)
+    return codecs[name]()
+
+
+def detect(f):
+    """returns the codec the binary file f was written with"""
+    head = f.read(len(BinaryCodec.MAGIC))
+    f.seek(-len(head), 1)
+    if head == BinaryCodec.MAGIC:
+        return BinaryCodec()
+    return JSONCodec()
+
+
+def read(f):
+    """yields the (key, record) pairs of the binary file f, whichever
+    codec it was written with"""
+    return detect(f).read(f)
+
+
+def convert(source, destination, codec):
+    """rewrites the snapshot file source to destination with codec"""
+    with open(source, "rb") as f_in, open(destination, "wb") as f_out:
+        codec.write(f_out, read(f_in))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__.strip().split("\n", 2)[2])
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2], get(*sys.argv[3:5]))
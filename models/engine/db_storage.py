@@ -3,18 +3,28 @@
 Contains the class DBStorage
 """
 
+import contextlib
+import itertools
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel, Base
 from models.city import City
+from models.engine.query import Query, lookups
+from models.engine.query_cache import QueryCache
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import and_, create_engine, event, func, literal, or_
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import class_mapper, joinedload, scoped_session
+from sqlalchemy.orm import make_transient_to_detached, selectinload
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import RelationshipProperty
+from sqlalchemy.orm.attributes import set_committed_value
+import threading
 
 classes = {
     "Amenity": Amenity,
@@ -25,34 +35,194 @@ classes = {
     "User": User,
 }
 
+# create_engine() pool options set by environment variables: variable,
+# type and default, None for the default of SQLAlchemy
+pool_options = {
+    "pool_size": ("HBNB_DB_POOL_SIZE", int, None),
+    "max_overflow": ("HBNB_DB_MAX_OVERFLOW", int, None),
+    "pool_timeout": ("HBNB_DB_POOL_TIMEOUT", float, None),
+    # below the MySQL wait_timeout, so that no idle connection is used
+    # once the server closed it
+    "pool_recycle": ("HBNB_DB_POOL_RECYCLE", int, 3600),
+    "pool_pre_ping": ("HBNB_DB_POOL_PRE_PING",
+                      lambda value: value.lower() in ("1", "true", "yes"),
+                      True),
+}
+
+
+def engine_options():
+    """returns the create_engine() pool options of the environment; a
+    threaded Flask process needs pool_size + max_overflow connections
+    for as many requests as it serves at once"""
+    options = {}
+    for option, (variable, convert, default) in pool_options.items():
+        value = getenv(variable)
+        if value is not None:
+            options[option] = convert(value)
+        elif default is not None:
+            options[option] = default
+    return options
+
+
+def query_cache():
+    """returns the QueryCache of the results of the classes named in
+    HBNB_DB_CACHE, separated by commas, kept HBNB_DB_CACHE_TTL seconds at
+    most, 60 by default; None if it names none, the default"""
+    names = [name.strip() for name in getenv("HBNB_DB_CACHE", "").split(",")
+             if name.strip()]
+    if not names:
+        return None
+    for name in names:
+        if name not in classes:
+            raise ValueError("HBNB_DB_CACHE: unknown class {}".format(name))
+    return QueryCache(names, float(getenv("HBNB_DB_CACHE_TTL", 60)))
+
+
+def column_values(obj):
+    """returns the column: value dictionary of obj, or None if it is"""
+    if obj is None:
+        return None
+    mapper = sqlalchemy.inspect(obj).mapper
+    return {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs}
+
 
 class DBStorage:
     """interaacts with the MySQL database"""
 
     __engine = None
     __session = None
+    # QueryCache of the results of get(), all() and count(), or None
+    __cache = None
+    # thread data - active: whether the thread is in a transaction, whose
+    # end commits its session
+    __local = threading.local()
 
     def __init__(self):
         """Instantiate a DBStorage object"""
-        HBNB_MYSQL_USER = getenv("HBNB_MYSQL_USER")
-        HBNB_MYSQL_PWD = getenv("HBNB_MYSQL_PWD")
-        HBNB_MYSQL_HOST = getenv("HBNB_MYSQL_HOST")
-        HBNB_MYSQL_DB = getenv("HBNB_MYSQL_DB")
         HBNB_ENV = getenv("HBNB_ENV")
-        self.__engine = create_engine(
-            "mysql+mysqldb://{}:{}@{}/{}".format(
-                HBNB_MYSQL_USER, HBNB_MYSQL_PWD, HBNB_MYSQL_HOST, HBNB_MYSQL_DB
-            )
-        )
+        self.__engine = self.create_engine()
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
+        self.__cache = query_cache()
+        self.warm_up(int(getenv("HBNB_DB_POOL_WARMUP", 0)))
+
+    def create_engine(self):
+        """returns the engine of the database HBNB_DB_URL, by default the
+        MySQL database of the HBNB_MYSQL_* variables, with the pool
+        options of engine_options()"""
+        HBNB_DB_URL = getenv("HBNB_DB_URL")
+        if HBNB_DB_URL is None:
+            HBNB_MYSQL_USER = getenv("HBNB_MYSQL_USER")
+            HBNB_MYSQL_PWD = getenv("HBNB_MYSQL_PWD")
+            HBNB_MYSQL_HOST = getenv("HBNB_MYSQL_HOST")
+            HBNB_MYSQL_DB = getenv("HBNB_MYSQL_DB")
+            HBNB_DB_URL = "mysql+mysqldb://{}:{}@{}/{}".format(
+                HBNB_MYSQL_USER, HBNB_MYSQL_PWD, HBNB_MYSQL_HOST, HBNB_MYSQL_DB
+            )
+        return create_engine(HBNB_DB_URL, **engine_options())
+
+    def warm_up(self, count):
+        """opens count connections of the pool at once and returns them to
+        it, so that the first requests do not wait for them"""
+        connections = []
+        try:
+            for i in range(count):
+                connections.append(self.__engine.connect())
+        finally:
+            for connection in connections:
+                connection.close()
+
+    def pool_stats(self):
+        """returns the size of the connection pool and its connections
+        checked in, checked out and in overflow"""
+        pool = self.__engine.pool
+        stats = {"pool": type(pool).__name__}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            if method is not None:
+                stats[name] = method()
+        return stats
+
+    def cache_stats(self):
+        """returns the statistics of the query cache, or None without one"""
+        if self.__cache is None:
+            return None
+        return self.__cache.stats()
+
+    def __caching(self, cls):
+        """returns whether the results of cls are read from the cache: it
+        caches them and the current session changed no object of cls, so
+        that they are those the session would read"""
+        if self.__cache is None or not self.__cache.caches(cls.__name__):
+            return False
+        if cls.__name__ in self.__session.info.get("changed", ()):
+            return False
+        session = self.__session
+        return not any(isinstance(obj, cls) for obj in itertools.chain(
+            session.new, session.dirty, session.deleted))
+
+    def __through_cache(self, cls, key, read):
+        """returns the result of key of cls from the cache, or read() and
+        stores it there"""
+        name = cls.__name__
+        found, result = self.__cache.get(name, key)
+        if not found:
+            generation = self.__cache.generation(name)
+            result = read()
+            self.__cache.put(name, key, result, generation)
+        return result
+
+    def __read_all(self, cls):
+        """returns the column values of every object of cls"""
+        return [column_values(obj)
+                for obj in self.__session.query(cls).all()]
+
+    def __revive(self, cls, values):
+        """returns the object of cls of the cached column values, part of
+        the current session without querying it, or None if values is"""
+        if values is None:
+            return None
+        obj = class_mapper(cls).class_manager.new_instance()
+        for key, value in values.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        return self.__session.merge(obj, load=False)
+
+    def __flushed(self, session, context):
+        """records the classes of the objects a flush of session wrote"""
+        changed = session.info.setdefault("changed", set())
+        for obj in itertools.chain(session.new, session.dirty,
+                                   session.deleted):
+            changed.add(type(obj).__name__)
+
+    def __committed(self, session):
+        """drops the cached results of the classes a commit of session
+        changed"""
+        for name in session.info.pop("changed", ()):
+            if self.__cache is not None and self.__cache.caches(name):
+                self.__cache.invalidate(name)
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    def __rolled_back(self, session):
+        """forgets the classes the flushes of session rolled back wrote"""
+        session.info.pop("changed", None)
+
+    def all(self, cls=None, load=()):
+        """query on the current database session, loading with the objects
+        of cls the relationships of the paths of load"""
+        if load and cls is None:
+            raise ValueError("load needs a class")
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                value = classes[clss]
+                if load or not self.__caching(value):
+                    objs = self.__session.query(value).options(
+                        *self.__loaders(value, load)).all()
+                else:
+                    objs = [self.__revive(value, values) for values
+                            in self.__through_cache(
+                                value, ("all",),
+                                lambda: self.__read_all(value))]
                 for obj in objs:
                     key = obj.__class__.__name__ + "." + obj.id
                     new_dict[key] = obj
@@ -63,8 +233,29 @@ class DBStorage:
         self.__session.add(obj)
 
     def save(self):
-        """commit all changes of the current database session"""
-        self.__session.commit()
+        """commit all changes of the current database session, unless a
+        transaction is open: it commits them when it ends"""
+        if not getattr(self.__local, "active", False):
+            self.__session.commit()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """commits the changes of the current database session made in it
+        at once when it ends, or rolls them back if it raises; a
+        transaction opened in another one is part of it"""
+        if getattr(self.__local, "active", False):
+            yield self
+            return
+        self.__local.active = True
+        try:
+            yield self
+            self.__local.active = False
+            self.__session.commit()
+        except BaseException:
+            self.__session.rollback()
+            raise
+        finally:
+            self.__local.active = False
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
@@ -75,6 +266,9 @@ class DBStorage:
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
         sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        event.listen(sess_factory, "after_flush", self.__flushed)
+        event.listen(sess_factory, "after_commit", self.__committed)
+        event.listen(sess_factory, "after_rollback", self.__rolled_back)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
@@ -89,15 +283,131 @@ class DBStorage:
         """
         if cls and id:
             if cls in classes.values() and isinstance(id, str):
-                all_objects = self.all(cls)
-
-                for key, value in all_objects.items():
-                    if key.split(".")[1] == id:
-                        return value
+                if not self.__caching(cls):
+                    return self.__session.get(cls, id)
+                return self.__revive(cls, self.__through_cache(
+                    cls, ("get", id),
+                    lambda: column_values(self.__session.get(cls, id))))
             else:
                 return
             return
 
+    def query(self, cls):
+        """returns a Query of the objects of cls, compiled to SQL"""
+        return Query(cls, self.__fetch, self.__count_matching,
+                     self.__stream)
+
+    def __fetch(self, query):
+        """returns the list of the objects of query"""
+        select = self.__select(query)
+        return select.all() if select is not None else []
+
+    def __stream(self, query, batch_size):
+        """yields the objects of query, fetched batch_size rows at a time
+        with a server-side cursor where the driver has one"""
+        select = self.__select(query)
+        if select is None:
+            return
+        result = self.__session.execute(
+            select.statement, execution_options={"yield_per": batch_size})
+        try:
+            yield from result.scalars()
+        finally:
+            result.close()
+
+    def iter(self, cls=None, batch_size=1000):
+        """yields the objects of cls, or of every class, one at a time,
+        fetching batch_size rows at a time"""
+        for clss, value in classes.items():
+            if cls is None or cls is value or cls == clss:
+                yield from self.query(value).iter(batch_size)
+
+    def __count_matching(self, query):
+        """returns the number of objects of query"""
+        select = self.__select(query, False)
+        return select.count() if select is not None else 0
+
+    def __select(self, query, load=True):
+        """returns the SQLAlchemy query of query, loading its relationships
+        if load, or None if its class is not mapped"""
+        cls = classes.get(query.cls, query.cls)
+        if cls not in classes.values():
+            return None
+        select = self.__session.query(cls)
+        if load:
+            select = select.options(*self.__loaders(cls, query.loading))
+        for attr, lookup, operand in query.filters:
+            column = self.__column(cls, attr)
+            if lookup == "in":
+                select = select.filter(column.in_(operand))
+            else:
+                select = select.filter(lookups[lookup](column, operand))
+        if query.keyset is not None:
+            select = select.filter(self.__after(cls, query))
+        for attr, descending in query.ordering:
+            column = self.__column(cls, attr)
+            select = select.order_by(column.desc() if descending
+                                     else column.asc())
+        if query.offset_:
+            select = select.offset(query.offset_)
+        if query.limit_ is not None:
+            select = select.limit(query.limit_)
+        return select
+
+    def __after(self, cls, query):
+        """returns the condition of the rows coming after the keyset of
+        query in its ordering: greater on an ordering column, the columns
+        before it being equal; NULL comes first, as sort_key orders None"""
+        conditions = []
+        equal = []
+        for (attr, descending), bound in zip(query.ordering, query.keyset):
+            column = self.__column(cls, attr)
+            if bound is None:
+                # nothing comes after NULL in descending order
+                if not descending:
+                    conditions.append(and_(*equal, column.is_not(None)))
+                equal.append(column.is_(None))
+                continue
+            if descending:
+                conditions.append(and_(
+                    *equal, or_(column < bound, column.is_(None))))
+            else:
+                conditions.append(and_(*equal, column > bound))
+            equal.append(column == bound)
+        return or_(*conditions)
+
+    def __loaders(self, cls, paths):
+        """returns the loader options of the relationship paths of cls,
+        such as "cities.places": collections are loaded by one SELECT ...
+        IN per relationship and batch of objects, many-to-one references
+        are joined"""
+        options = []
+        for path in paths:
+            option = None
+            current = cls
+            for name in path.split("."):
+                attr = getattr(current, name, None)
+                prop = getattr(attr, "property", None)
+                if not isinstance(prop, RelationshipProperty):
+                    raise ValueError("{} has no relationship {}".format(
+                        current.__name__, name))
+                loader = selectinload if prop.uselist else joinedload
+                if option is None:
+                    option = loader(attr)
+                else:
+                    option = getattr(option, loader.__name__)(attr)
+                current = prop.mapper.class_
+            options.append(option)
+        return options
+
+    def __column(self, cls, attr):
+        """returns the column of cls called attr"""
+        column = getattr(cls, attr, None)
+        if column is None or not hasattr(column, "property"):
+            raise ValueError("{} has no column {}".format(
+                cls.__name__, attr))
+        return column
+
     def count(self, cls=None):
         """
         Method to count the number of objects in storage:
@@ -106,12 +416,44 @@ class DBStorage:
                 Returns the count of all objects in storage
         """
         if not cls:
-            inst_of_all_cls = self.all()
-            return len(inst_of_all_cls)
+            return sum(self.count_all().values())
         for clas, value in classes.items():
             if cls == clas or cls == value:
-                all_inst_of_prov_cls = self.all(cls)
-                return len(all_inst_of_prov_cls)
+                if not self.__caching(value):
+                    return self.__session.query(
+                        func.count(value.id)).scalar()
+                return self.__through_cache(
+                    value, ("count",), lambda: self.__session.query(
+                        func.count(value.id)).scalar())
 
         if cls not in classes.values():
             return
+
+    def count_all(self):
+        """
+        Method to count the objects of every class at once:
+            Returns a dictionary of <class name>: no of objects,
+            fetched with a single UNION ALL of COUNT(*) queries of
+            those the query cache does not hold
+        """
+        cached = {}
+        generations = {}
+        for clas, value in classes.items():
+            if self.__caching(value):
+                generations[clas] = self.__cache.generation(clas)
+                found, count = self.__cache.get(clas, ("count",))
+                if found:
+                    cached[clas] = count
+        missing = [clas for clas in classes if clas not in cached]
+        counts = {}
+        if missing:
+            counts = dict(self.__session.execute(union_all(*[
+                select(literal(clas).label("cls"), func.count())
+                .select_from(classes[clas].__table__)
+                for clas in missing
+            ])).all())
+        for clas, count in counts.items():
+            if clas in generations:
+                self.__cache.put(clas, ("count",), count, generations[clas])
+        return {clas: cached[clas] if clas in cached else counts[clas]
+                for clas in classes}
@@ -3,14 +3,34 @@
 Contains the FileStorage class
 """
 
+import bisect
+import contextlib
+from datetime import datetime
+import heapq
+import itertools
 import json
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.engine import codec
+from models.engine.codec import read
+from models.engine.lazy_objects import LazyObjects, PagedObjects
+from models.engine.query import Query, follows, matches, ordering_key
+from models.engine.query import sort_key
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+from os import getenv
+import os
+import struct
+import threading
+import time
+try:
+    import fcntl
+except ImportError:
+    # no file locks: processes sharing a file are not coordinated
+    fcntl = None
 
 classes = {
     "Amenity": Amenity,
@@ -23,54 +43,1072 @@ classes = {
 }
 
 
+# foreign keys of each class that FileStorage keeps a reverse index of
+relations = {
+    "City": ("state_id",),
+    "Place": ("city_id", "user_id"),
+    "Review": ("place_id", "user_id"),
+}
+# ordering of the queries served by the created_at index, that of the API
+# pages
+by_created = (("created_at", False), ("id", False))
+
+
+def class_name(cls):
+    """returns the name of cls, given either as a class or as a string"""
+    if isinstance(cls, str):
+        return cls
+    return getattr(cls, "__name__", None)
+
+
+def build(record):
+    """returns a new instance built from a serialized record"""
+    return classes[record["__class__"]](**record)
+
+
+def stored_class(value):
+    """returns the class name of a stored instance or record"""
+    if type(value) is dict:
+        return value["__class__"]
+    return value.__class__.__name__
+
+
+def stored_attr(value, attr):
+    """returns the attribute attr of a stored instance or record"""
+    if type(value) is dict:
+        return value.get(attr)
+    return getattr(value, attr, None)
+
+
+def stored_value(cls, value, attr):
+    """returns the attribute attr of a stored instance or record of cls as
+    the instance has it: the class default if the record lacks it, and
+    created_at and updated_at as datetimes"""
+    if type(value) is not dict:
+        return getattr(value, attr, None)
+    if attr not in value:
+        return getattr(cls, attr, None)
+    value = value[attr]
+    if attr in ("created_at", "updated_at") and isinstance(value, str):
+        return datetime.strptime(value, codec.time)
+    return value
+
+
+def stored_record(value):
+    """returns the record of a stored instance or record as to_dict()
+    gives it, with its datetimes serialized, whichever codec decoded it"""
+    if type(value) is not dict:
+        return value.to_dict()
+    return {key: codec.to_json(item) if isinstance(item, datetime) else item
+            for key, item in value.items()}
+
+
+def created_entry(key, value):
+    """returns the entry of the stored instance or record value of key in
+    the created_at index: its (created_at, id) as it is sorted"""
+    cls = classes.get(stored_class(value))
+    return (sort_key(stored_value(cls, value, "created_at")),
+            key.partition(".")[2])
+
+
+def drop_entry(entries, entry, key):
+    """removes the entry of key from the sorted list entries, looking for
+    it by id if its created_at changed behind the index's back"""
+    i = bisect.bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
+        return
+    obj_id = key.partition(".")[2]
+    for i, (created_at, entry_id) in enumerate(entries):
+        if entry_id == obj_id:
+            del entries[i]
+            return
+
+
+def file_stamp(path):
+    """returns the (inode, mtime, size) of path, None if it is missing"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def read_journal(path, offset=0):
+    """returns the [key, record] entries of the journal at path from byte
+    offset on, and the offset just past the last complete entry"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    # a save still in progress, or interrupted, leaves a torn last line
+    end = data.rfind(b"\n") + 1
+    entries = []
+    for line in data[:end].splitlines():
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            pass
+    return entries, offset + end
+
+
+def write_snapshot(path, records, codec, sync=False, encoded=False):
+    """writes the (key, record) pairs of records, or the pairs already
+    encoded by codec if encoded, to the snapshot file at path with codec
+    one at a time, and flushes it to disk if sync"""
+    with open(path, "wb") as f:
+        if encoded:
+            codec.write_encoded(f, records)
+        else:
+            codec.write(f, records)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def fsync_path(path):
+    """flushes the file or directory at path to disk, if it exists"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def locked(path, exclusive=False, wait=True):
+    """holds a shared or exclusive lock on the file at path, created if
+    needed, and yields its descriptor; yields None if it cannot be
+    locked, or is locked by another process and not wait"""
+    if fcntl is None:
+        yield None
+        return
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        yield None
+        return
+    try:
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(fd, flags if wait else flags | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield None
+            return
+        yield fd
+    finally:
+        # closing the descriptor releases the lock
+        os.close(fd)
+
+
+def read_generation(fd):
+    """returns the generation counter stored in the lock file fd, or None
+    without a lock file"""
+    if fd is None:
+        return None
+    data = os.pread(fd, 8, 0)
+    return struct.unpack(">Q", data)[0] if len(data) == 8 else 0
+
+
+def write_generation(fd, generation):
+    """stores the generation counter in the lock file fd"""
+    if fd is not None:
+        os.pwrite(fd, struct.pack(">Q", generation), 0)
+
+
+def merge_journal(file_path, journal_path, out_path, codec, sync=False):
+    """writes the snapshot file at file_path merged with the journal at
+    journal_path to out_path with codec, streaming the records of the
+    snapshot file"""
+    changes = dict(read_journal(journal_path)[0])
+
+    def merged(f):
+        """yields the records of f updated by the journal, then the new
+        records of the journal"""
+        if f is not None:
+            for key, record in read(f):
+                record = changes.pop(key, record)
+                if record is not None:
+                    yield key, record
+        for key, record in changes.items():
+            if record is not None:
+                yield key, record
+
+    try:
+        f = open(file_path, "rb")
+    except FileNotFoundError:
+        f = None
+    try:
+        write_snapshot(out_path, merged(f), codec, sync)
+    finally:
+        if f is not None:
+            f.close()
+
+
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
 
     # string - path to the JSON file
     __file_path = "file.json"
-    # dictionary - empty but will store all objects by <class name>.id
+    # dictionary - empty but will store all objects by <class name>.id;
+    # with HBNB_FILE_LAZY=1, a LazyObjects that builds the objects read
+    # from the file on first access and keeps the last
+    # HBNB_FILE_LAZY_CACHE of them; with HBNB_FILE_PAGED=1, a PagedObjects
+    # that also spills their records to disk, keeping at most
+    # HBNB_FILE_PAGED_BUDGET bytes of record pages in memory: the keys,
+    # their locators and the indexes stay in memory besides, a few hundred
+    # bytes per object, so the objects must still fit in memory as keys
     __objects = {}
+    if getenv("HBNB_FILE_PAGED") == "1":
+        __objects = PagedObjects(
+            build, int(getenv("HBNB_FILE_LAZY_CACHE", 10000)),
+            int(getenv("HBNB_FILE_PAGED_BUDGET", 64 << 20)))
+    elif getenv("HBNB_FILE_LAZY") == "1":
+        __objects = LazyObjects(
+            build, int(getenv("HBNB_FILE_LAZY_CACHE", 10000)))
+    # dictionary - the objects of __objects grouped by <class name>; in
+    # lazy mode only their keys are used
+    __by_class = {}
+    # dictionary - (<class name>, <foreign key>) -> value -> objects
+    __by_relation = {}
+    # dictionary - <class name> -> sorted list of the (created_at, id) of
+    # its objects, built for a class by the first query needing it
+    __by_created = {}
+    # dictionary - the __objects dictionary the indexes were built from
+    __indexed = None
+    # dictionaries returned by all() and all(cls) to readers: the
+    # __objects dictionary and the __by_class buckets by <class name>;
+    # a change copies them first, so that readers iterate a snapshot
+    __lent = None
+    __lent_classes = {}
+    # dictionary - objects changed since the last save by key, None for
+    # the deleted ones
+    __dirty = {}
+    # boolean - append the changes to <__file_path>.journal on save
+    # instead of rewriting the whole JSON file
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    # integer - journal size in bytes past which it is compacted
+    __journal_limit = int(getenv("HBNB_FILE_JOURNAL_LIMIT", 4 << 20))
+    # thread - the background compaction of the journal, if any
+    __compactor = None
+    # tuple - the __objects dictionary and the file_stamp() of the JSON
+    # file, the old journal and the journal it was last synced with
+    __synced = (None, None)
+    # integer - the generation it was last synced with: a counter kept in
+    # <__file_path>.lock, which every save increments under an exclusive
+    # lock of that file, so that processes sharing the file see each
+    # other's writes even when the file stamps cannot tell
+    __generation = None
+    # string - when saves reach the disk: "fsync" on every save,
+    # "interval" at most __fsync_interval seconds later, or "buffered"
+    # whenever the OS flushes its buffers
+    __durability = getenv("HBNB_FILE_DURABILITY", "buffered")
+    __fsync_interval = float(getenv("HBNB_FILE_FSYNC_INTERVAL", 1))
+    # codec - how the snapshot file is written: "json", or "binary" with
+    # an optional "zlib", "bz2" or "lzma" compressor; it is read with
+    # whichever codec it was written with
+    __codec = codec.get(getenv("HBNB_FILE_CODEC", "json"),
+                        getenv("HBNB_FILE_COMPRESSOR"))
+    # boolean - keep the cache of encoded records: a save then encodes
+    # only the objects changed since the last one, which it knows of by
+    # new() or setting an attribute, so that an object changed in place,
+    # such as a list attribute appended to, is written as it was when last
+    # encoded until then
+    __encoded_cache = getenv("HBNB_FILE_ENCODED_CACHE") == "1"
+    # tuple - the __objects dictionary and the codec the cache was made
+    # for, and the cache: the bytes the codec encoded the record of each
+    # clean object to by key; lazy mode keeps no cache, whose bytes would
+    # double the records it keeps
+    __encoded = (None, None, {})
+    # timer - the pending fsync of the "interval" durability, if any
+    __syncer = None
+    # condition and counters grouping concurrent saves into one write:
+    # saves requested, saves already on disk, whether one is writing
+    __commit = threading.Condition()
+    __requested = 0
+    __committed = 0
+    __committing = False
+    # locks - one for the objects and indexes, one for the files
+    __lock = threading.RLock()
+    __io_lock = threading.Lock()
+    # lock held by the open transaction, if any, and by the saves, so that
+    # no save writes the changes of a transaction before it commits
+    __writing = threading.RLock()
+    # thread data - undo: the state before the open transaction of the
+    # thread of each key it changed, None outside of a transaction
+    __local = threading.local()
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
-        if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
-        return self.__objects
+    def all(self, cls=None, load=()):
+        """returns the dictionary __objects, or only the objects of cls,
+        to be read only; in the default mode both are snapshots that later
+        changes do not alter, while in lazy and paged mode the dictionary
+        of every object is the live LazyObjects, safe to iterate while it
+        changes but showing the objects added and removed since; the
+        relationships are looked up in the indexes, so there is nothing to
+        load beforehand"""
+        if isinstance(self.__objects, LazyObjects):
+            if cls is None:
+                return self.__objects
+            return self.__resolve(
+                self.__class_index().get(class_name(cls), {}))
+        with self.__lock:
+            if cls is None:
+                FileStorage.__lent = self.__objects
+                return self.__objects
+            name = class_name(cls)
+            bucket = self.__class_index().get(name)
+            if bucket is None:
+                return {}
+            self.__lent_classes[name] = bucket
+            return bucket
 
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
             key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            with self.__lock:
+                self.__touch(key)
+                self.__insert(key, obj)
+                # it may have been changed in place
+                self.__encoded[2].pop(key, None)
+                self.__dirty[key] = obj
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, "w") as f:
-            json.dump(json_objects, f)
+        """serializes __objects to the JSON file (path: __file_path), or
+        appends the changes since the last save to its journal; saves
+        called while another one writes share the next write, and those
+        called in a transaction are left to its commit"""
+        if self.__undo() is not None:
+            return
+        with self.__commit:
+            FileStorage.__requested += 1
+            ticket = self.__requested
+            while self.__committing:
+                self.__commit.wait()
+            if self.__committed >= ticket:
+                return
+            FileStorage.__committing = True
+        committed = self.__committed
+        try:
+            with self.__writing:
+                committed = self.__save()
+        finally:
+            with self.__commit:
+                FileStorage.__committing = False
+                FileStorage.__committed = committed
+                self.__commit.notify_all()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """groups the changes the thread makes in it into one save when it
+        ends, or undoes them if it raises; saves wait for it to end, and a
+        transaction opened in another one is part of it"""
+        if self.__undo() is not None:
+            yield self
+            return
+        with self.__writing:
+            undo = self.__local.undo = {}
+            try:
+                yield self
+            except BaseException:
+                self.__rollback(undo)
+                raise
+            finally:
+                self.__local.undo = None
+        if undo:
+            self.save()
+
+    def __undo(self):
+        """returns the undo log of the open transaction of the thread, or
+        None"""
+        return getattr(self.__local, "undo", None)
+
+    def __touch(self, key, obj=None, attr=None, old=None, had=True):
+        """logs the state of key before the open transaction of the thread
+        first changes it: the stored value, the attributes of obj or of
+        the stored instance, attr being old, and whether it was dirty"""
+        undo = self.__undo()
+        if undo is None or key in undo:
+            return
+        stored = self.__stored(key)
+        if obj is None and stored is not None and type(stored) is not dict:
+            obj = stored
+        state = None
+        if obj is not None:
+            state = dict(obj.__dict__)
+            if not had:
+                state.pop(attr, None)
+            elif attr is not None:
+                state[attr] = old
+        undo[key] = (stored, obj, state, key in self.__dirty,
+                     self.__dirty.get(key))
+
+    def __rollback(self, undo):
+        """restores the keys of undo to their state before the transaction"""
+        with self.__lock:
+            for key, (stored, obj, state, dirty, value) in undo.items():
+                if key in self.__objects:
+                    self.__remove(key)
+                if obj is not None:
+                    obj.__dict__.clear()
+                    obj.__dict__.update(state)
+                if stored is not None:
+                    self.__insert(key, stored)
+                if dirty:
+                    self.__dirty[key] = value
+                else:
+                    self.__dirty.pop(key, None)
+
+    def __save(self):
+        """writes the pending changes and returns the number of the last
+        save request they cover"""
+        if not self.__journal:
+            # the compaction needs __io_lock to finish
+            self.__wait_compaction()
+        with self.__io_lock, \
+                locked(self.__file_path + ".lock", True) as fd:
+            # take in what other processes saved, so that writing the
+            # whole file does not drop it; replaced __objects are written
+            # as they are
+            if self.__synced[0] is self.__objects:
+                self.__catch_up(fd)
+            with self.__lock:
+                # read before taking the changes: every save counted
+                # here made its changes before asking to be saved
+                covered = self.__requested
+                dirty = self.__dirty
+                FileStorage.__dirty = {}
+                # the records of lazy mode are written as they are
+                objects = list(dict.items(self.__objects))
+            try:
+                if self.__journal:
+                    self.__append(dirty)
+                else:
+                    self.__write(objects)
+            except Exception:
+                with self.__lock:
+                    for key, obj in dirty.items():
+                        self.__dirty.setdefault(key, obj)
+                raise
+            self.__release(dirty.items() if self.__journal else objects)
+            if fd is not None:
+                FileStorage.__generation = read_generation(fd) + 1
+                write_generation(fd, self.__generation)
+            return covered
+
+    def __release(self, written):
+        """stores the records of the instances of the (key, value) pairs
+        written, just saved, still stored and unchanged since, so that
+        lazy mode no longer keeps them all in memory"""
+        objects = self.__objects
+        if not isinstance(objects, LazyObjects):
+            return
+        with self.__lock:
+            for key, obj in written:
+                if obj is None or type(obj) is objects.placeholder or \
+                        key in self.__dirty or \
+                        dict.get(objects, key) is not obj:
+                    continue
+                objects.release(key, obj.to_dict())
+
+    def __write(self, objects):
+        """replaces the snapshot file with objects and drops the journal;
+        the records of the objects in the cache are not encoded again"""
+        cache = self.__cache()
+        encode = self.__codec.encode
+        fresh = []
+
+        def entries():
+            """yields the encoded records, caching those it encodes"""
+            for key, obj in objects:
+                data = cache.get(key) if cache is not None else None
+                if data is None:
+                    data = encode(key, self.__serialized(obj))
+                    if cache is not None:
+                        fresh.append((key, obj, data))
+                yield data
+
+        tmp = self.__tmp_path()
+        write_snapshot(tmp, entries(), self.__codec,
+                       self.__durability == "fsync", encoded=True)
+        os.replace(tmp, self.__file_path)
+        with self.__lock:
+            for key, obj, data in fresh:
+                # those changed while they were written are dirty again
+                if key not in self.__dirty and self.__stored(key) is obj:
+                    cache[key] = data
+        for path in (self.__file_path + ".journal",
+                     self.__file_path + ".journal.old"):
+            if os.path.exists(path):
+                os.remove(path)
+        self.__flushed()
+        FileStorage.__synced = (self.__objects, self.__stamps())
+
+    def __append(self, dirty):
+        """appends the dirty objects to the journal, one line each"""
+        synced = self.__synced == (self.__objects, self.__stamps())
+        with open(self.__file_path + ".journal", "a") as f:
+            for key, obj in dirty.items():
+                record = None if obj is None else obj.to_dict()
+                f.write(json.dumps([key, record]) + "\n")
+            size = f.tell()
+            if self.__durability == "fsync":
+                f.flush()
+                os.fsync(f.fileno())
+        self.__flushed()
+        if synced:
+            FileStorage.__synced = (self.__objects, self.__stamps())
+        if size > self.__journal_limit:
+            self.__compact()
+
+    def __tmp_path(self):
+        """returns the temporary file the JSON file is written to before
+        being renamed over it, so that it is never seen half written"""
+        return "{}.{}.tmp".format(self.__file_path, os.getpid())
+
+    def __flushed(self):
+        """finishes a write according to __durability"""
+        if self.__durability == "fsync":
+            fsync_path(os.path.dirname(os.path.abspath(self.__file_path)))
+        elif self.__durability == "interval":
+            if self.__syncer is None or not self.__syncer.is_alive():
+                FileStorage.__syncer = threading.Timer(
+                    self.__fsync_interval, self.__fsync)
+                self.__syncer.daemon = True
+                self.__syncer.start()
+
+    def __fsync(self):
+        """flushes the JSON file, its journals and its directory to disk"""
+        for path in (self.__file_path, self.__file_path + ".journal",
+                     self.__file_path + ".journal.old",
+                     os.path.dirname(os.path.abspath(self.__file_path))):
+            fsync_path(path)
+
+    def __compact(self):
+        """merges the journal into the JSON file in a background thread"""
+        if self.__compactor is not None and self.__compactor.is_alive():
+            return
+        # held by the compaction thread: one process compacts at a time
+        stack = contextlib.ExitStack()
+        fd = stack.enter_context(
+            locked(self.__file_path + ".compact", True, wait=False))
+        if fd is None and fcntl is not None:
+            stack.close()
+            return
+        journal = self.__file_path + ".journal"
+        # appends go to a fresh journal while the old one is merged; a
+        # leftover .old from an interrupted compaction is merged first
+        if not os.path.exists(journal + ".old"):
+            synced = self.__synced == (self.__objects, self.__stamps())
+            os.replace(journal, journal + ".old")
+            if synced:
+                FileStorage.__synced = (self.__objects, self.__stamps())
+        FileStorage.__compactor = threading.Thread(
+            target=self.__compaction, args=(stack,))
+        self.__compactor.start()
+
+    def __compaction(self, stack):
+        """merges the old journal into the JSON file, then releases the
+        compaction lock held by stack; runs in a thread"""
+        with stack:
+            journal = self.__file_path + ".journal.old"
+            tmp = self.__tmp_path()
+            stamps = self.__stamps()[:2]
+            merge_journal(self.__file_path, journal, tmp, self.__codec,
+                          self.__durability != "buffered")
+            with self.__io_lock, \
+                    locked(self.__file_path + ".lock", True):
+                if self.__stamps()[:2] != stamps:
+                    # another process rewrote the file meanwhile, with
+                    # the old journal in it
+                    os.remove(tmp)
+                    return
+                # the merged file holds the same objects, so a storage
+                # synced with the file and the old journal stays synced
+                synced = self.__synced == (self.__objects, self.__stamps())
+                os.replace(tmp, self.__file_path)
+                if self.__durability != "buffered":
+                    fsync_path(os.path.dirname(os.path.abspath(tmp)))
+                os.remove(journal)
+                if synced:
+                    FileStorage.__synced = (self.__objects, self.__stamps())
+
+    def __wait_compaction(self):
+        """blocks until the background compaction, if any, is done"""
+        if self.__compactor is not None:
+            self.__compactor.join()
+
+    def __stamps(self):
+        """returns the file_stamp() of the JSON file and both journals"""
+        return (file_stamp(self.__file_path),
+                file_stamp(self.__file_path + ".journal.old"),
+                file_stamp(self.__file_path + ".journal"))
 
     def reload(self):
-        """deserializes the JSON file to __objects"""
+        """deserializes the JSON file and its journal to __objects, or
+        only the journal entries added since the last reload or save"""
+        with self.__io_lock:
+            with locked(self.__file_path + ".lock") as fd:
+                self.__catch_up(fd)
+
+    def __catch_up(self, fd):
+        """reloads what other writers changed since the last sync, under
+        the lock file fd; the objects changed since the last save are
+        kept as they are"""
+        generation = read_generation(fd)
+        objects, stamps = self.__synced
+        current = self.__stamps()
+        if objects is self.__objects and stamps[:2] == current[:2]:
+            if stamps[2] == current[2]:
+                if generation == self.__generation:
+                    return
+            elif stamps[2] is None or current[2] is not None and \
+                    stamps[2][0] == current[2][0]:
+                self.__reload_journal(stamps[2])
+                FileStorage.__generation = generation
+                return
+        self.__reload_all()
+        FileStorage.__generation = generation
+
+    def __reload_journal(self, stamp):
+        """applies the journal entries written after it had stamp"""
+        offset = stamp[2] if stamp is not None else 0
+        journal, end = read_journal(self.__file_path + ".journal", offset)
+        self.__apply((), journal)
+        self.__collect()
+        stamps = self.__stamps()
+        if end != stamps[2][2]:
+            # the last entry is still being written: read it next time
+            stamps = stamps[:2] + (stamps[2][:2] + (end,),)
+        FileStorage.__synced = (self.__objects, stamps)
+
+    def __reload_all(self):
+        """deserializes the JSON file and both journals to __objects"""
+        stamps = self.__stamps()
+        # the old journal is read first: if a compaction replaces the
+        # JSON file meanwhile, the one opened next already contains it
+        journal = read_journal(self.__file_path + ".journal.old")[0]
         try:
-            with open(self.__file_path, "r") as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
-        except Exception:
-            pass
+            f = open(self.__file_path, "rb")
+        except OSError:
+            f = None
+        try:
+            entries, end = read_journal(self.__file_path + ".journal")
+            # the files hold every saved object unless there are none:
+            # those __objects was synced with and no longer in the files
+            # were deleted by another process
+            complete = self.__synced[0] is self.__objects and (
+                f is not None or stamps[1:] != (None, None))
+            self.__apply(read(f) if f else (), journal + entries, complete)
+        finally:
+            if f is not None:
+                f.close()
+        self.__collect()
+        if stamps[2] is not None and end != stamps[2][2]:
+            stamps = stamps[:2] + (stamps[2][:2] + (end,),)
+        FileStorage.__synced = (self.__objects, stamps)
+
+    def __apply(self, records, journal, complete=False):
+        """stores the objects of the (key, record) pairs of records, built
+        one at a time, then replays the journal entries; if they are
+        complete, the saved objects found in neither are removed"""
+        with self.__lock:
+            seen = set()
+            failed = False
+            try:
+                for key, record in records:
+                    seen.add(key)
+                    self.__update(key, record)
+            except Exception:
+                failed = True
+            try:
+                for key, record in journal:
+                    seen.add(key)
+                    if record is not None:
+                        self.__update(key, record)
+                    elif key in self.__objects and key not in self.__dirty:
+                        self.__remove(key)
+            except Exception:
+                failed = True
+            if complete and not failed:
+                for key in list(self.__objects):
+                    if key not in seen and key not in self.__dirty:
+                        self.__remove(key)
+
+    def __update(self, key, record):
+        """stores the object of record under key, unless the stored object
+        changed since the last save or is the same as record"""
+        if key in self.__dirty:
+            return
+        stored = self.__stored(key)
+        if stored is not None and \
+                stored_record(record) == stored_record(stored):
+            return
+        self.__insert(key, self.__load(record))
+
+    def __load(self, record):
+        """returns a new instance built from a serialized record, or the
+        record itself in lazy mode"""
+        if isinstance(self.__objects, LazyObjects):
+            if record["__class__"] not in classes:
+                raise KeyError(record["__class__"])
+            return record
+        return build(record)
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
             key = obj.__class__.__name__ + "." + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            with self.__lock:
+                if key in self.__objects:
+                    self.__touch(key)
+                    self.__remove(key)
+                    self.__dirty[key] = None
+
+    def related(self, cls, attr, value):
+        """returns the list of cls objects whose attribute attr is value"""
+        name = class_name(cls)
+        self.__check_index()
+        if attr not in relations.get(name, ()):
+            found = {key: obj for key, obj
+                     in list(self.__by_class.get(name, {}).items())
+                     if stored_attr(self.__stored(key), attr) == value}
+        else:
+            found = self.__by_relation.get((name, attr), {}).get(value, {})
+        return list(self.__resolve(found).values())
+
+    def query(self, cls):
+        """returns a Query of the objects of cls, answered from the class
+        and relation indexes"""
+        return Query(cls, self.__fetch, self.__count_matching,
+                     self.__stream)
+
+    def __fetch(self, query):
+        """returns the list of the objects of query, building only those
+        in lazy mode"""
+        found = self.__matching(query, True)
+        return list(self.__resolve(dict(found)).values())
+
+    def __count_matching(self, query):
+        """returns the number of objects of query"""
+        return len(self.__matching(query, False))
+
+    def __matching(self, query, ordered):
+        """returns the (key, stored instance or record) pairs of the
+        objects of query, sorted if ordered, within its offset and limit;
+        a limited query holds only the objects up to its limit: those of
+        the created_at index from its keyset if it is in that order and no
+        condition narrows it, else the first ones of a pass over them"""
+        end = None
+        if query.limit_ is not None:
+            end = query.offset_ + query.limit_
+        if not ordered or not query.ordering:
+            return list(itertools.islice(self.__filtered(query),
+                                         query.offset_, end))
+        cls = classes.get(class_name(query.cls))
+        if end is None:
+            found = list(self.__filtered(query))
+            for attr, descending in reversed(query.ordering):
+                found.sort(key=lambda pair: sort_key(
+                    stored_value(cls, pair[1], attr)), reverse=descending)
+            return found[query.offset_:]
+        keys = self.__candidates(query)
+        if query.ordering == by_created and cls is not None and keys is None:
+            return self.__walk_created(query, end)[query.offset_:]
+        key = ordering_key(query.ordering)
+
+        def ordered_by(pair):
+            """returns the sort key of a (key, stored value) pair"""
+            return key([stored_value(cls, pair[1], attr)
+                        for attr, descending in query.ordering])
+
+        found = heapq.nsmallest(end, self.__filtered(query, keys),
+                                key=ordered_by)
+        return found[query.offset_:]
+
+    def __walk_created(self, query, count):
+        """returns the first count (key, stored instance or record) pairs
+        of query in (created_at, id) order, walking the created_at index
+        from its keyset a chunk at a time"""
+        name = class_name(query.cls)
+        bound = None
+        if query.keyset is not None:
+            bound = (sort_key(query.keyset[0]), query.keyset[1])
+        found = []
+        while len(found) < count:
+            with self.__lock:
+                entries = self.__created_index(name)
+                start = 0
+                if bound is not None:
+                    start = bisect.bisect_right(entries, bound)
+                chunk = entries[start:start + max(2 * (count - len(found)),
+                                                  16)]
+            if not chunk:
+                break
+            keys = ["{}.{}".format(name, obj_id) for created_at, obj_id
+                    in chunk]
+            found.extend(itertools.islice(self.__filtered(query, keys),
+                                          count - len(found)))
+            bound = chunk[-1]
+        return found
+
+    def __candidates(self, query):
+        """returns the keys of the objects of query the relation index
+        finds when a condition on a foreign key or on the id allows it,
+        or None"""
+        name = class_name(query.cls)
+        self.__check_index()
+        for attr, lookup, operand in query.filters:
+            if lookup not in ("eq", "in"):
+                continue
+            values = [operand] if lookup == "eq" else operand
+            if attr == "id":
+                return ["{}.{}".format(name, value) for value in values]
+            if attr in relations.get(name, ()):
+                index = self.__by_relation.get((name, attr), {})
+                return [key for value in values
+                        for key in list(index.get(value, ()))]
+        return None
+
+    def __filtered(self, query, keys=None):
+        """yields the (key, stored instance or record) pairs of the objects
+        of keys, by default the candidates of query or else every object of
+        its class, satisfying its conditions and its keyset, one at a
+        time"""
+        name = class_name(query.cls)
+        cls = classes.get(name)
+        if cls is None:
+            return
+        if keys is None:
+            keys = self.__candidates(query)
+        if keys is None:
+            keys = list(self.__by_class.get(name, ()))
+        for key in dict.fromkeys(keys):
+            value = self.__stored(key)
+            if value is None or not all(
+                    matches(stored_value(cls, value, attr), lookup, operand)
+                    for attr, lookup, operand in query.filters):
+                continue
+            if query.keyset is not None and not follows(
+                    [stored_value(cls, value, attr)
+                     for attr, descending in query.ordering],
+                    query.keyset, query.ordering):
+                continue
+            yield key, value
+
+    def __stream(self, query, batch_size):
+        """yields the objects of query, building batch_size of them at a
+        time in lazy mode; only an ordered query holds all of them"""
+        if query.ordering:
+            yield from self.__fetch(query)
+            return
+        end = None
+        if query.limit_ is not None:
+            end = query.offset_ + query.limit_
+        batch = {}
+        for key, value in itertools.islice(
+                self.__filtered(query), query.offset_, end):
+            batch[key] = value
+            if len(batch) >= batch_size:
+                yield from self.__resolve(batch).values()
+                batch = {}
+        yield from self.__resolve(batch).values()
+
+    def iter(self, cls=None, batch_size=1000):
+        """yields the objects of cls, or of every class, one at a time,
+        building batch_size of them at a time in lazy mode"""
+        names = [class_name(cls)] if cls is not None else list(classes)
+        for name in names:
+            yield from self.query(name).iter(batch_size)
+
+    def attribute_changed(self, obj, attr, old, had=True):
+        """marks a stored obj dirty, and moves it in the relation index
+        when one of its foreign keys changes; attr was old before, if obj
+        had it"""
+        name = obj.__class__.__name__
+        key = "{}.{}".format(name, obj.__dict__.get("id"))
+        if self.__built(key) is not obj:
+            return
+        with self.__lock:
+            self.__touch(key, obj, attr, old, had)
+            self.__dirty[key] = obj
+            self.__encoded[2].pop(key, None)
+            if dict.get(self.__objects, key) is not obj:
+                # keep the changed instance rather than its old record
+                self.__objects[key] = obj
+            entries = self.__by_created.get(name)
+            if attr == "created_at" and entries is not None:
+                drop_entry(entries, (sort_key(old if had else None),
+                                     obj.__dict__.get("id")), key)
+                bisect.insort(entries, created_entry(key, obj))
+            if attr not in relations.get(name, ()):
+                return
+            self.__check_index()
+            index = self.__by_relation.setdefault((name, attr), {})
+            index.get(old, {}).pop(key, None)
+            index.setdefault(getattr(obj, attr, None), {})[key] = obj
+
+    def __cache(self):
+        """returns the cache of encoded records, emptied if __objects or
+        the codec was replaced, or None if it is off or in lazy mode"""
+        objects, codec, cache = self.__encoded
+        if not self.__encoded_cache or \
+                isinstance(self.__objects, LazyObjects):
+            return None
+        if objects is not self.__objects or codec is not self.__codec:
+            with self.__lock:
+                cache = {}
+                FileStorage.__encoded = (self.__objects, self.__codec, cache)
+        return cache
+
+    def __stored(self, key):
+        """returns the instance or, in lazy mode, the record or instance
+        stored under key, without building it"""
+        if isinstance(self.__objects, LazyObjects):
+            return self.__objects.stored(key)
+        return self.__objects.get(key)
+
+    def __serialized(self, value):
+        """returns the record of a value of __objects"""
+        objects = self.__objects
+        if isinstance(objects, LazyObjects) and \
+                type(value) is objects.placeholder:
+            return objects.record(value)
+        return value.to_dict()
+
+    def __collect(self):
+        """lets lazy mode free what replaced records left behind"""
+        if isinstance(self.__objects, LazyObjects):
+            with self.__lock:
+                self.__objects.collect()
+
+    def __built(self, key):
+        """returns the instance stored under key if it is built"""
+        if isinstance(self.__objects, LazyObjects):
+            return self.__objects.peek(key)
+        return self.__objects.get(key)
+
+    def __resolve(self, found):
+        """returns a dict of the instances of the keys of found, taken
+        from __objects so that lazy mode builds them"""
+        objects = self.__objects
+        if isinstance(objects, LazyObjects):
+            found = {key: objects.get(key) for key in list(found)}
+            return {key: obj for key, obj in found.items() if obj is not None}
+        return dict(found)
+
+    def __own(self):
+        """replaces __objects with a copy if all() returned it, before it
+        is changed"""
+        objects = self.__objects
+        if self.__lent is not objects or type(objects) is not dict:
+            return
+        copy = dict(objects)
+        if self.__indexed is objects:
+            FileStorage.__indexed = copy
+        if self.__synced[0] is objects:
+            FileStorage.__synced = (copy, self.__synced[1])
+        if self.__encoded[0] is objects:
+            FileStorage.__encoded = (copy,) + self.__encoded[1:]
+        FileStorage.__objects = copy
+        FileStorage.__lent = None
+
+    def __bucket(self, name):
+        """returns the __by_class bucket of name to change, replaced with
+        a copy if all(cls) returned it"""
+        bucket = self.__by_class.get(name)
+        if bucket is None:
+            bucket = self.__by_class[name] = {}
+        elif self.__lent_classes.get(name) is bucket:
+            bucket = self.__by_class[name] = dict(bucket)
+            del self.__lent_classes[name]
+        return bucket
+
+    def __check_index(self):
+        """rebuilds the indexes if __objects was replaced"""
+        if FileStorage.__indexed is self.__objects:
+            return
+        with self.__lock:
+            if FileStorage.__indexed is self.__objects:
+                return
+            FileStorage.__by_class = {}
+            FileStorage.__by_relation = {}
+            FileStorage.__by_created = {}
+            FileStorage.__lent_classes = {}
+            FileStorage.__indexed = self.__objects
+            for key in list(self.__objects):
+                self.__index(key, self.__stored(key))
+
+    def __class_index(self):
+        """returns __by_class, rebuilding it if __objects was replaced"""
+        self.__check_index()
+        return self.__by_class
+
+    def __index(self, key, obj):
+        """adds obj to the class and relation indexes"""
+        name = stored_class(obj)
+        value = obj
+        if isinstance(self.__objects, LazyObjects):
+            # only the keys are used: do not keep the records alive
+            value = None
+        self.__bucket(name)[key] = value
+        for attr in relations.get(name, ()):
+            index = self.__by_relation.setdefault((name, attr), {})
+            index.setdefault(stored_attr(obj, attr), {})[key] = value
+        entries = self.__by_created.get(name)
+        if entries is not None:
+            bisect.insort(entries, created_entry(key, obj))
+
+    def __unindex(self, key, obj):
+        """removes obj from the class and relation indexes"""
+        name = stored_class(obj)
+        self.__bucket(name).pop(key, None)
+        for attr in relations.get(name, ()):
+            index = self.__by_relation.get((name, attr), {})
+            index.get(stored_attr(obj, attr), {}).pop(key, None)
+        entries = self.__by_created.get(name)
+        if entries is not None:
+            drop_entry(entries, created_entry(key, obj), key)
+
+    def __created_index(self, name):
+        """returns the sorted (created_at, id) of the objects of the class
+        called name, building it on first use"""
+        self.__check_index()
+        with self.__lock:
+            entries = self.__by_created.get(name)
+            if entries is None:
+                entries = sorted(
+                    created_entry(key, self.__stored(key))
+                    for key in list(self.__by_class.get(name, ())))
+                self.__by_created[name] = entries
+            return entries
+
+    def __insert(self, key, obj):
+        """stores obj under key in __objects and in the indexes"""
+        self.__check_index()
+        old = self.__stored(key)
+        if old is obj:
+            return
+        self.__own()
+        if old is not None:
+            self.__unindex(key, old)
+        self.__objects[key] = obj
+        self.__encoded[2].pop(key, None)
+        self.__index(key, obj)
+
+    def __remove(self, key):
+        """removes key from __objects and from the indexes"""
+        self.__check_index()
+        old = self.__stored(key)
+        self.__own()
+        self.__objects.pop(key)
+        self.__encoded[2].pop(key, None)
+        self.__unindex(key, old)
 
     def close(self):
         """call reload() method for deserializing the JSON file to objects"""
@@ -82,12 +1120,8 @@ class FileStorage:
             and its ID or NONE if not found
         """
         if cls and id:
-            if cls in classes.values():
-                all_objects = self.all(cls)
-
-                for value in all_objects.values():
-                    if value.id == id:
-                        return value
+            if class_name(cls) in classes:
+                return self.__objects.get(class_name(cls) + "." + str(id))
             return
         return
 
@@ -99,12 +1133,17 @@ class FileStorage:
                 Returns the count of all objects in storage
         """
         if not cls:
-            inst_of_all_cls = self.all()
-            return len(inst_of_all_cls)
+            return len(self.__objects)
 
-        if cls in classes.values():
-            all_inst_of_prov_cls = self.all(cls)
-            return len(all_inst_of_prov_cls)
+        if class_name(cls) in classes:
+            return len(self.__class_index().get(class_name(cls), {}))
 
-        if cls not in classes.values():
-            return None
+        return None
+
+    def count_all(self):
+        """
+        Method to count the objects of every class at once:
+            Returns a dictionary of <class name>: no of objects
+        """
+        index = self.__class_index()
+        return {name: len(index.get(name, {})) for name in classes}
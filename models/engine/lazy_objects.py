@@ -0,0 +1,315 @@
+#!/usr/bin/python3
+"""
+Contains the LazyObjects and PagedObjects classes
+"""
+
+from collections import OrderedDict
+from collections.abc import ItemsView, ValuesView
+import json
+from models.engine.codec import to_json
+import os
+import tempfile
+import threading
+import weakref
+
+
+class Values(ValuesView):
+    """view of the instances of a LazyObjects, skipping the keys removed
+    while it is iterated"""
+
+    def __iter__(self):
+        """yields the instances of the keys present when it starts"""
+        for key in self._mapping:
+            obj = self._mapping.get(key)
+            if obj is not None:
+                yield obj
+
+
+class Items(ItemsView):
+    """view of the (key, instance) pairs of a LazyObjects, skipping the
+    keys removed while it is iterated"""
+
+    def __iter__(self):
+        """yields the pairs of the keys present when it starts"""
+        for key in self._mapping:
+            obj = self._mapping.get(key)
+            if obj is not None:
+                yield key, obj
+
+
+class LazyObjects(dict):
+    """<class name>.id: object dictionary that keeps the objects read from
+    the file as their serialized records and builds each instance on first
+    access; the last size instances built stay in an LRU cache
+
+    An instance set directly, by new() or once changed, is stored as is
+    until it is saved or reloaded, so that its changes are not lost on
+    eviction; release() then stores its record and leaves it to the cache.
+    """
+
+    # type of what stands for a record not built yet: the record itself
+    placeholder = dict
+
+    def __init__(self, load, size=10000):
+        """initializes an empty dictionary building instances with load"""
+        super().__init__()
+        self.load = load
+        self.size = size
+        # key: instance, least recently used first
+        self.cache = OrderedDict()
+        # key: instance still referenced somewhere, so that evicting it
+        # from the cache never gives two instances for one key
+        self.live = weakref.WeakValueDictionary()
+        self.loads = 0
+        self.lock = threading.RLock()
+
+    def __getitem__(self, key):
+        """returns the instance stored under key, building it if needed"""
+        value = dict.__getitem__(self, key)
+        if type(value) is not self.placeholder:
+            return value
+        with self.lock:
+            obj = self.cache.get(key)
+            if obj is not None:
+                self.cache.move_to_end(key)
+                return obj
+            obj = self.live.get(key)
+        built = obj is None
+        if built:
+            obj = self.load(self.record(value))
+        with self.lock:
+            if dict.get(self, key) is not value:
+                # replaced while it was being built
+                return self[key]
+            obj = self.live.setdefault(key, obj)
+            self.loads += built
+            self.cache[key] = obj
+            if len(self.cache) > self.size:
+                self.cache.popitem(last=False)
+        return obj
+
+    def __setitem__(self, key, value):
+        """stores an instance or a record under key"""
+        with self.lock:
+            self.cache.pop(key, None)
+            self.live.pop(key, None)
+            dict.__setitem__(self, key, value)
+
+    def __iter__(self):
+        """iterates over a snapshot of the keys, so that other threads can
+        change the dictionary meanwhile; being overridden, it also makes
+        dict() and {**objects} copy through __getitem__ instead of the
+        records"""
+        return iter(list(dict.keys(self)))
+
+    def release(self, key, record):
+        """stores record, that of the instance stored under key, and puts
+        the instance in the cache, to be evicted as any instance built"""
+        with self.lock:
+            obj = dict.get(self, key)
+            self[key] = record
+            self.live[key] = obj
+            self.cache[key] = obj
+            if len(self.cache) > self.size:
+                self.cache.popitem(last=False)
+
+    def get(self, key, default=None):
+        """returns the instance stored under key, or default"""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def peek(self, key):
+        """returns the instance stored under key if it is built, without
+        building it"""
+        value = dict.get(self, key)
+        if type(value) is not self.placeholder:
+            return value
+        with self.lock:
+            obj = self.cache.get(key)
+            return obj if obj is not None else self.live.get(key)
+
+    def stored(self, key):
+        """returns the instance or the record stored under key, without
+        building it, or None"""
+        value = dict.get(self, key)
+        if type(value) is self.placeholder:
+            return self.record(value)
+        return value
+
+    def record(self, value):
+        """returns the record a placeholder stands for"""
+        return value
+
+    def collect(self):
+        """frees what the replaced and removed records left behind, which
+        the garbage collector already does for records kept in memory"""
+
+    def pop(self, key, *default):
+        """removes key and returns what it stored, record or instance"""
+        with self.lock:
+            self.cache.pop(key, None)
+            self.live.pop(key, None)
+            return dict.pop(self, key, *default)
+
+    def clear(self):
+        """removes every key"""
+        with self.lock:
+            self.cache.clear()
+            self.live.clear()
+            dict.clear(self)
+
+    def values(self):
+        """returns a view of the instances, built as they are iterated"""
+        return Values(self)
+
+    def items(self):
+        """returns a view of the (key, instance) pairs, built as they are
+        iterated"""
+        return Items(self)
+
+    def copy(self):
+        """returns a dict of the instances"""
+        return dict(self)
+
+
+class PagedObjects(LazyObjects):
+    """LazyObjects that spills the records to pages of a temporary file
+    and stands for each one with its locator in the file; at most budget
+    bytes of pages stay in memory, the least recently used being evicted
+
+    The budget caps the record pages only: the keys and their locators,
+    and the built instances of the cache, are held besides it. Saved
+    instances are spilled as well, by release().
+
+    A locator is <page number> << 64 | <start in the page> << 32 | <length>
+    """
+
+    placeholder = int
+
+    def __init__(self, load, size=10000, budget=64 << 20,
+                 page_size=64 << 10):
+        """initializes an empty dictionary spilling records to pages of
+        page_size bytes and keeping budget bytes of them in memory"""
+        super().__init__(load, size)
+        self.budget = budget
+        self.page_size = page_size
+        self.file = tempfile.TemporaryFile()
+        # (offset, length) in the file of each page written
+        self.pages = []
+        # the page being filled, not written yet
+        self.buffer = bytearray()
+        # page number: bytes of the pages in memory, least recent first
+        self.resident = OrderedDict()
+        self.resident_size = 0
+        self.reads = 0
+        # bytes of the records spilled, and of those still stored
+        self.spilled = 0
+        self.stored_size = 0
+
+    def __setitem__(self, key, value):
+        """stores an instance, or spills a record and stores its locator"""
+        with self.lock:
+            self.drop(dict.get(self, key))
+            if type(value) is dict:
+                value = self.append(
+                    json.dumps(value, default=to_json).encode("utf-8"))
+            super().__setitem__(key, value)
+
+    def pop(self, key, *default):
+        """removes key and returns what it stored, instance or locator"""
+        with self.lock:
+            value = super().pop(key, *default)
+            self.drop(value)
+            return value
+
+    def clear(self):
+        """removes every key and the pages"""
+        with self.lock:
+            super().clear()
+            self.file.truncate(0)
+            self.pages = []
+            self.buffer = bytearray()
+            self.resident.clear()
+            self.resident_size = self.spilled = self.stored_size = 0
+
+    def record(self, value):
+        """returns the record of a locator, reading its page if needed"""
+        start = value >> 32 & 0xffffffff
+        with self.lock:
+            page = self.page(value >> 64)
+            data = page[start:start + (value & 0xffffffff)]
+        return json.loads(data)
+
+    def append(self, data):
+        """adds data to the page being filled and returns its locator"""
+        if self.buffer and len(self.buffer) + len(data) > self.page_size:
+            self.flush()
+        locator = len(self.pages) << 64 | len(self.buffer) << 32 | len(data)
+        self.buffer += data
+        self.spilled += len(data)
+        self.stored_size += len(data)
+        return locator
+
+    def drop(self, value):
+        """accounts for the record of value no longer being stored"""
+        if type(value) is int:
+            self.stored_size -= value & 0xffffffff
+
+    def flush(self):
+        """writes the page being filled to the file"""
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.pages.append((offset, len(self.buffer)))
+        self.buffer = bytearray()
+
+    def page(self, number):
+        """returns the page number, reading it from the file if it is not
+        in memory and evicting the least recently used pages past budget"""
+        if number == len(self.pages):
+            return self.buffer
+        data = self.resident.get(number)
+        if data is not None:
+            self.resident.move_to_end(number)
+            return data
+        offset, length = self.pages[number]
+        data = os.pread(self.file.fileno(), length, offset)
+        self.reads += 1
+        self.resident[number] = data
+        self.resident_size += length
+        while self.resident_size > self.budget and len(self.resident) > 1:
+            self.resident_size -= len(self.resident.popitem(last=False)[1])
+        return data
+
+    def collect(self):
+        """rewrites the pages without the replaced and removed records
+        once they take more room than the stored ones"""
+        with self.lock:
+            garbage = self.spilled - self.stored_size
+            if garbage <= max(self.stored_size, self.page_size << 4):
+                return
+            # read the old pages in order, one at a time
+            locators = sorted((value, key) for key, value in dict.items(self)
+                              if type(value) is int)
+            old_file, old_pages, old_buffer = \
+                self.file, self.pages, self.buffer
+            self.file = tempfile.TemporaryFile()
+            self.pages = []
+            self.buffer = bytearray()
+            self.resident.clear()
+            self.resident_size = self.spilled = self.stored_size = 0
+            number, page = None, None
+            for value, key in locators:
+                if value >> 64 != number:
+                    number = value >> 64
+                    if number == len(old_pages):
+                        page = old_buffer
+                    else:
+                        offset, length = old_pages[number]
+                        page = os.pread(old_file.fileno(), length, offset)
+                start = value >> 32 & 0xffffffff
+                data = page[start:start + (value & 0xffffffff)]
+                dict.__setitem__(self, key, self.append(bytes(data)))
+            old_file.close()
@@ -0,0 +1,214 @@
+#!/usr/bin/python3
+"""
+Contains the Query class the storage engines answer queries with
+"""
+
+import functools
+import operator
+
+# lookups a filter condition may end with, as in price_by_night__lte
+lookups = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda value, values: value in values,
+}
+
+
+def parse(condition):
+    """returns the (attribute, lookup) of a filter condition name"""
+    attr, sep, lookup = condition.rpartition("__")
+    if not sep or lookup not in lookups:
+        return condition, "eq"
+    return attr, lookup
+
+
+def matches(value, lookup, operand):
+    """returns whether value satisfies the lookup with operand as SQL
+    would: None, NULL, satisfies only eq None, and values that cannot be
+    compared with operand satisfy no comparison"""
+    if value is None:
+        return lookup == "eq" and operand is None
+    try:
+        return lookups[lookup](value, operand)
+    except TypeError:
+        return False
+
+
+def sort_key(value):
+    """returns the key ordering value, None first as SQL does"""
+    return (value is not None, value)
+
+
+def ordering_key(ordering):
+    """returns the sort key function of the lists of the values of the
+    ordering attributes of objects, which orders them in ordering, None
+    first as sort_key does"""
+    if not any(descending for attr, descending in ordering):
+        return lambda values: tuple(sort_key(value) for value in values)
+
+    def compare(values, others):
+        """returns -1, 0 or 1 as values come before, with or after others
+        in ordering"""
+        for value, other, (attr, descending) in zip(values, others,
+                                                    ordering):
+            value, other = sort_key(value), sort_key(other)
+            if value != other:
+                result = -1 if value < other else 1
+                return -result if descending else result
+        return 0
+
+    return functools.cmp_to_key(compare)
+
+
+def follows(values, keyset, ordering):
+    """returns whether the values of the ordering attributes of an object
+    place it after those of keyset in ordering"""
+    for value, bound, (attr, descending) in zip(values, keyset, ordering):
+        value, bound = sort_key(value), sort_key(bound)
+        if value != bound:
+            try:
+                return value < bound if descending else value > bound
+            except TypeError:
+                return False
+    return False
+
+
+class Query:
+    """the objects of a class satisfying filter conditions, in an order
+    and within a limit, fetched by the storage engine when they are read
+
+    storage.query(Place).filter(city_id=city_id, price_by_night__lte=100)
+    .order_by("-price_by_night", "name").limit(50).all()
+
+    Every method returning a Query returns a new one, so that a query can
+    be refined without changing it. after() and pages() page through the
+    objects by keyset rather than offset: each page starts past the
+    ordering values of the last object of the previous one, so that an
+    index of the ordering finds it without reading the objects before
+    it. The database engines have one for (created_at, id), the order
+    the API pages in, as FileStorage does; any other ordering costs a
+    pass over the matching objects, holding only those of the page.
+    """
+
+    def __init__(self, cls, fetch, count, stream=None):
+        """initializes a query of every object of cls, fetched by calling
+        fetch(query), counted by calling count(query) and iterated over by
+        calling stream(query, batch_size), pages() if there is none"""
+        self.cls = cls
+        # (attribute, lookup, operand) of each condition
+        self.filters = ()
+        # (attribute, descending) of each ordering
+        self.ordering = ()
+        self.limit_ = None
+        self.offset_ = 0
+        # values of the ordering attributes the objects come after
+        self.keyset = None
+        # relationship paths loaded with the objects
+        self.loading = ()
+        self.fetch = fetch
+        self.counter = count
+        self.stream = stream
+
+    def refined(self, **changes):
+        """returns a copy of the query with the attributes changes"""
+        query = Query(self.cls, self.fetch, self.counter, self.stream)
+        query.__dict__.update(self.__dict__)
+        query.__dict__.update(changes)
+        return query
+
+    def filter(self, **conditions):
+        """returns the query of the objects also satisfying conditions:
+        attribute=value, or attribute__lookup=value with a lookup among
+        eq, ne, lt, lte, gt, gte and in"""
+        filters = []
+        for condition, operand in conditions.items():
+            attr, lookup = parse(condition)
+            if lookup == "in":
+                operand = list(operand)
+            filters.append((attr, lookup, operand))
+        return self.refined(filters=self.filters + tuple(filters))
+
+    def order_by(self, *attrs):
+        """returns the query of the objects ordered by attrs, in
+        descending order for those starting with -"""
+        ordering = tuple((attr.lstrip("-"), attr.startswith("-"))
+                         for attr in attrs)
+        return self.refined(ordering=self.ordering + ordering)
+
+    def limit(self, limit):
+        """returns the query of at most limit objects"""
+        return self.refined(limit_=limit)
+
+    def offset(self, offset):
+        """returns the query of the objects past the first offset ones"""
+        return self.refined(offset_=offset)
+
+    def load(self, *paths):
+        """returns the query of the objects fetched with the relationships
+        of paths, such as "cities" or "cities.places", so that walking them
+        costs no more queries; engines that do not query a database to
+        walk a relationship ignore them"""
+        return self.refined(loading=self.loading + paths)
+
+    def after(self, *values):
+        """returns the query of the objects coming after those whose
+        ordering attributes have values, in its ordering"""
+        return self.refined(keyset=values)
+
+    def key_of(self, obj):
+        """returns the values of the ordering attributes of obj, which
+        after() takes"""
+        return tuple(getattr(obj, attr, None) for attr, descending
+                     in self.ordering)
+
+    def pages(self, size):
+        """yields the objects of the query in lists of at most size, each
+        one fetched after the last object of the previous one; id is added
+        to the ordering unless it is there, so that no two objects have
+        the same keys"""
+        query = self
+        if "id" not in [attr for attr, descending in self.ordering]:
+            query = self.order_by("id")
+        page = query.limit(size).all()
+        while page:
+            yield page
+            if len(page) < size:
+                return
+            page = query.after(*query.key_of(page[-1])).limit(size).all()
+
+    def iter(self, batch_size=1000):
+        """yields the objects of the query one at a time, fetching
+        batch_size of them at a time, so that walking many objects holds
+        few of them in memory"""
+        if self.stream is not None:
+            return self.stream(self, batch_size)
+        return (obj for page in self.pages(batch_size) for obj in page)
+
+    def all(self):
+        """returns the list of the objects of the query"""
+        return self.fetch(self)
+
+    def first(self):
+        """returns the first object of the query, or None"""
+        found = self.limit(1).all()
+        return found[0] if found else None
+
+    def count(self):
+        """returns the number of objects of the query, within its limit"""
+        return self.counter(self)
+
+    def __iter__(self):
+        """iterates over the objects of the query"""
+        return iter(self.all())
+
+    def __repr__(self):
+        """returns the representation of the query"""
+        return "<Query {} filters={} ordering={} after={} limit={} " \
+            "offset={} load={}>".format(
+                getattr(self.cls, "__name__", self.cls), list(self.filters),
+                list(self.ordering), self.keyset, self.limit_, self.offset_,
+                list(self.loading))
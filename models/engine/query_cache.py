@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""
+Contains the QueryCache class
+"""
+
+import threading
+import time
+
+
+class QueryCache:
+    """process-local cache of the results DBStorage read for some classes
+
+    Each result is stored under the name of its class and a key, such as
+    ("get", id), and dropped when a commit changes that class or once it
+    is ttl seconds old, for the commits of other processes. A result read
+    while the class was invalidated is not stored, so that a commit made
+    during a read is never hidden by it.
+    """
+
+    def __init__(self, names, ttl=60, clock=time.monotonic):
+        """initializes an empty cache of the results of the classes called
+        names, kept ttl seconds at most"""
+        self.names = frozenset(names)
+        self.ttl = ttl
+        self.clock = clock
+        # class name: {key: (expiry, result)}
+        self.entries = {}
+        # class name: number of times it was invalidated
+        self.generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def caches(self, name):
+        """returns whether the results of the class called name are cached"""
+        return name in self.names
+
+    def generation(self, name):
+        """returns the generation of the class called name, which put()
+        takes to tell whether it was invalidated since"""
+        with self.lock:
+            return self.generations.get(name, 0)
+
+    def get(self, name, key):
+        """returns (True, result) if the result of key of the class called
+        name is cached and fresh, else (False, None)"""
+        with self.lock:
+            keys = self.entries.get(name, {})
+            entry = keys.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del keys[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, name, key, result, generation):
+        """stores result under key of the class called name, unless it was
+        invalidated since generation"""
+        with self.lock:
+            if self.generations.get(name, 0) != generation:
+                return
+            expiry = self.clock() + self.ttl
+            self.entries.setdefault(name, {})[key] = (expiry, result)
+
+    def invalidate(self, name):
+        """drops the results of the class called name"""
+        with self.lock:
+            self.entries.pop(name, None)
+            self.generations[name] = self.generations.get(name, 0) + 1
+            self.invalidations += 1
+
+    def stats(self):
+        """returns the hits, misses, hit ratio, invalidations and entries
+        of the cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "classes": sorted(self.names),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": sum(len(keys) for keys in self.entries.values()),
+            }
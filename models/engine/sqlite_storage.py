@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+"""
+Contains the class SQLiteStorage
+"""
+
+from models.engine.db_storage import DBStorage, engine_options
+from os import getenv
+from sqlalchemy import create_engine, event
+
+
+def set_pragmas(connection, record):
+    """enforces the foreign keys and turns on the write-ahead log of every
+    new SQLite connection"""
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+class SQLiteStorage(DBStorage):
+    """interacts with an embedded SQLite database file"""
+
+    def create_engine(self):
+        """returns the engine of the SQLite database file HBNB_SQLITE_PATH,
+        hbnb.db by default, with the pool options of engine_options()"""
+        HBNB_SQLITE_PATH = getenv("HBNB_SQLITE_PATH", "hbnb.db")
+        engine = create_engine(
+            "sqlite:///{}".format(HBNB_SQLITE_PATH),
+            # the scoped sessions of the API run in several threads
+            connect_args={"check_same_thread": False},
+            **engine_options()
+        )
+        event.listen(engine, "connect", set_pragmas)
+        return engine
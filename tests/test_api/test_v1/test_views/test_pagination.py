@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""
+Contains the TestPaginationDocs and TestPagination classes
+"""
+
+from api.v1.app import app
+from api.v1.views import pagination
+from datetime import datetime
+import inspect
+import json
+import models
+from models.state import State
+import pycodestyle as pep8
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+
+class TestPaginationDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the pagination
+    module"""
+
+    def test_pep8_conformance_pagination(self):
+        """Test that api/v1/views/pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(["api/v1/views/pagination.py"])
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_pep8_conformance_test_pagination(self):
+        """Test tests/test_api/test_v1/test_views/test_pagination.py
+        conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(
+            ["tests/test_api/test_v1/test_views/test_pagination.py"]
+        )
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_pagination_module_docstring(self):
+        """Test for the pagination.py module docstring"""
+        self.assertIsNot(pagination.__doc__, None,
+                         "pagination.py needs a docstring")
+        self.assertTrue(len(pagination.__doc__) >= 1,
+                        "pagination.py needs a docstring")
+
+    def test_pagination_func_docstrings(self):
+        """Test for the presence of docstrings in pagination functions"""
+        for func in inspect.getmembers(pagination, inspect.isfunction):
+            if func[1].__module__ != pagination.__name__:
+                continue
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestPagination(unittest.TestCase):
+    """Test the pages of the API collections"""
+
+    def setUp(self):
+        """Save States, some created at the same time"""
+        now = datetime.utcnow()
+        self.states = [State(name="paged_{}".format(i),
+                             created_at=now if i < 3 else datetime.utcnow())
+                       for i in range(5)]
+        for state in self.states:
+            models.storage.new(state)
+        models.storage.save()
+        self.client = app.test_client()
+
+    def tearDown(self):
+        """Delete the States saved"""
+        for state in self.states:
+            models.storage.delete(models.storage.get(State, state.id))
+        models.storage.save()
+        models.storage.close()
+
+    def get(self, url):
+        """Return the status, headers and body of a GET request"""
+        response = self.client.get(url)
+        try:
+            return response.status_code, response.headers, response.data
+        finally:
+            response.close()
+
+    def test_cursor(self):
+        """Test that a cursor stands for the (created_at, id) it encodes,
+        and that anything else is no cursor"""
+        values = (datetime(2017, 3, 25, 2, 17, 6, 123), "id")
+        cursor = pagination.encode_cursor(values)
+        self.assertEqual(pagination.decode_cursor(cursor), values)
+        for cursor in ("garbage", "", "W10=", "bm90IGpzb24="):
+            self.assertIsNone(pagination.decode_cursor(cursor))
+
+    def test_walk(self):
+        """Test that following X-Next-Cursor walks every State once, in
+        pages of at most limit of them, until the header disappears"""
+        url = "/api/v1/states?limit=2"
+        seen = []
+        sizes = []
+        while True:
+            status, headers, data = self.get(url)
+            self.assertEqual(status, 200)
+            page = json.loads(data)
+            sizes.append(len(page))
+            seen += [state["id"] for state in page]
+            cursor = headers.get("X-Next-Cursor")
+            if cursor is None:
+                self.assertNotIn("Link", headers)
+                break
+            self.assertEqual(len(page), 2)
+            link = headers["Link"]
+            self.assertTrue(link.startswith("<http://localhost/api/v1/"
+                                            "states?"), link)
+            self.assertTrue(link.endswith('>; rel="next"'), link)
+            query = parse_qs(urlsplit(link[1:link.index(">")]).query)
+            self.assertEqual(query, {"limit": ["2"], "cursor": [cursor]})
+            url = link[len("<http://localhost"):link.index(">")]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), {key.split(".")[1] for key
+                                     in models.storage.all(State)})
+        self.assertLessEqual(sizes[-1], 2)
+
+    def test_last_page(self):
+        """Test that a page holding the last State has no next cursor"""
+        count = models.storage.count(State)
+        status, headers, data = self.get(
+            "/api/v1/states?limit={}".format(count))
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(data)), count)
+        self.assertNotIn("X-Next-Cursor", headers)
+
+    def test_invalid(self):
+        """Test that an invalid limit or cursor is a 400 error"""
+        for query in ("limit=0", "limit=abc", "limit=1001", "limit=-1",
+                      "cursor=garbage", "limit=2&cursor=bm90IGpzb24="):
+            with self.subTest(query=query):
+                status, headers, data = self.get(
+                    "/api/v1/states?" + query)
+                self.assertEqual(status, 400)
@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+"""
+Contains the TestStreamingDocs and TestStreaming classes
+"""
+
+from api.v1.app import app
+from api.v1.views import streaming
+from flask import jsonify
+import inspect
+import json
+import models
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+import pycodestyle as pep8
+import unittest
+
+
+class TestStreamingDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the streaming module"""
+
+    def test_pep8_conformance_streaming(self):
+        """Test that api/v1/views/streaming.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(["api/v1/views/streaming.py"])
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_pep8_conformance_test_streaming(self):
+        """Test tests/test_api/test_v1/test_views/test_streaming.py
+        conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(
+            ["tests/test_api/test_v1/test_views/test_streaming.py"]
+        )
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_streaming_module_docstring(self):
+        """Test for the streaming.py module docstring"""
+        self.assertIsNot(streaming.__doc__, None,
+                         "streaming.py needs a docstring")
+        self.assertTrue(len(streaming.__doc__) >= 1,
+                        "streaming.py needs a docstring")
+
+    def test_streaming_func_docstrings(self):
+        """Test for the presence of docstrings in streaming functions"""
+        for func in inspect.getmembers(streaming, inspect.isfunction):
+            if func[1].__module__ != streaming.__name__:
+                continue
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestStreaming(unittest.TestCase):
+    """Test the collections the API streams"""
+
+    records = [{"id": "1", "name": "Ohio", "cities": ["a", "b"]},
+               {"id": "2", "name": None, "number": 3.5}]
+
+    def setUp(self):
+        """Save a State, a City, a User and a Place with an Amenity"""
+        self.compact = app.json.compact
+        self.debug = app.debug
+        self.state = State(name="Streamed")
+        self.city = City(name="Streamed", state_id=self.state.id)
+        self.user = User(email="stream@hbnb.io", password="pwd")
+        self.amenity = Amenity(name="Streamed")
+        self.place = Place(name="Streamed", city_id=self.city.id,
+                           user_id=self.user.id)
+        if models.storage_t == "db":
+            self.place.amenities.append(self.amenity)
+        else:
+            self.place.amenity_ids = [self.amenity.id]
+        self.objs = [self.state, self.city, self.user, self.amenity,
+                     self.place]
+        for obj in self.objs:
+            models.storage.new(obj)
+        models.storage.save()
+        self.client = app.test_client()
+
+    def tearDown(self):
+        """Delete the objects saved and restore the app settings"""
+        app.json.compact = self.compact
+        app.debug = self.debug
+        for obj in reversed(self.objs):
+            models.storage.delete(models.storage.get(type(obj), obj.id))
+        models.storage.save()
+        models.storage.close()
+
+    def get(self, *args, **kwargs):
+        """Return the status, headers and body of a GET request"""
+        response = self.client.get(*args, **kwargs)
+        try:
+            return response.status_code, response.headers, response.data
+        finally:
+            response.close()
+
+    def stream_and_jsonify(self, records):
+        """Return the bodies stream() and jsonify() make of records"""
+        with app.test_request_context():
+            streamed = streaming.stream(iter(records)).get_data()
+            expected = jsonify(records).get_data()
+        return streamed, expected
+
+    def test_array_compact(self):
+        """Test that the array is the one jsonify() makes, compact"""
+        app.json.compact = None
+        app.debug = False
+        streamed, expected = self.stream_and_jsonify(self.records)
+        self.assertEqual(streamed, expected)
+        self.assertNotIn(b"\n  ", streamed)
+
+    def test_array_debug(self):
+        """Test that the array is the one jsonify() makes, indented in
+        debug mode"""
+        app.json.compact = None
+        app.debug = True
+        streamed, expected = self.stream_and_jsonify(self.records)
+        self.assertEqual(streamed, expected)
+        self.assertIn(b"\n  ", streamed)
+
+    def test_empty(self):
+        """Test that an empty collection is an empty array"""
+        for debug in (False, True):
+            app.debug = debug
+            streamed, expected = self.stream_and_jsonify([])
+            self.assertEqual(streamed, b"[]\n")
+            self.assertEqual(streamed, expected)
+
+    def test_collection(self):
+        """Test that a collection streams every object as jsonify() would
+        return it"""
+        status, headers, data = self.get("/api/v1/states")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "application/json")
+        states = json.loads(data)
+        self.assertEqual(len(states), models.storage.count(State))
+        self.assertIn(self.state.to_dict(), states)
+
+    def test_ndjson(self):
+        """Test that NDJSON holds one object per line"""
+        status, headers, data = self.get(
+            "/api/v1/states", headers={"Accept": "application/x-ndjson"})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "application/x-ndjson")
+        lines = data.decode("utf-8").split("\n")
+        self.assertEqual(lines.pop(), "")
+        self.assertEqual(len(lines), models.storage.count(State))
+        self.assertIn(self.state.id, [json.loads(line)["id"]
+                                      for line in lines])
+
+    def test_places_search_drops_amenities(self):
+        """Test that the places found are streamed without amenities"""
+        response = self.client.post(
+            "/api/v1/places_search",
+            json={"amenities": [self.amenity.id]})
+        try:
+            self.assertEqual(response.status_code, 200)
+            places = json.loads(response.data)
+        finally:
+            response.close()
+        self.assertEqual([place["id"] for place in places], [self.place.id])
+        self.assertNotIn("amenities", places[0])
@@ -158,3 +158,16 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(old_created_at, new_created_at)
         self.assertTrue(mock_storage.new.called)
         self.assertTrue(mock_storage.save.called)
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    @mock.patch('models.storage')
+    def test_init_reports_nothing(self, mock_storage):
+        """Test that the attributes set by __init__ are not reported to the
+        storage, unlike those set afterwards"""
+        inst = BaseModel(id="1", name="built",
+                         created_at="2017-03-25T02:17:06.000001")
+        BaseModel()
+        self.assertFalse(mock_storage.attribute_changed.called)
+        inst.name = "changed"
+        mock_storage.attribute_changed.assert_called_once_with(
+            inst, "name", "built", True)
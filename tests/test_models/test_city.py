@@ -85,6 +85,20 @@ class TestCity(unittest.TestCase):
         else:
             self.assertEqual(city.state_id, "")
 
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_places(self):
+        """Test that places lists the places stored for the city"""
+        from models.place import Place
+        city = City()
+        place = Place(city_id=city.id)
+        other = Place()
+        models.storage.new(place)
+        models.storage.new(other)
+        self.assertEqual(city.places, [place])
+        models.storage.delete(place)
+        models.storage.delete(other)
+        self.assertEqual(city.places, [])
+
     def test_to_dict_creates_dict(self):
         """test to_dict method creates a dictionary with proper attrs"""
         c = City()
@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+"""
+Contains the TestCodecDocs classes
+"""
+
+from datetime import datetime
+import inspect
+import io
+import json
+from models.engine import codec
+import os
+import pycodestyle as pep8
+import tempfile
+import unittest
+
+
+class TestCodecDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the codec module"""
+
+    def test_pep8_conformance_codec(self):
+        """Test that models/engine/codec.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(["models/engine/codec.py"])
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_pep8_conformance_test_codec(self):
+        """Test tests/test_models/test_engine/test_codec.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(
+            ["tests/test_models/test_engine/test_codec.py"]
+        )
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_codec_module_docstring(self):
+        """Test for the codec.py module docstring"""
+        self.assertIsNot(codec.__doc__, None, "codec.py needs a docstring")
+        self.assertTrue(len(codec.__doc__) >= 1, "codec.py needs a docstring")
+
+    def test_codec_func_docstrings(self):
+        """Test for the presence of docstrings in codec functions"""
+        functions = inspect.getmembers(codec, inspect.isfunction)
+        for cls in (codec.JSONCodec, codec.BinaryCodec):
+            functions += inspect.getmembers(cls, inspect.isfunction)
+        for func in functions:
+            self.assertIsNot(
+                func[1].__doc__, None, "{:s} needs a docstring".format(
+                    func[0])
+            )
+            self.assertTrue(
+                len(func[1].__doc__) >= 1,
+                "{:s} needs a docstring".format(func[0]),
+            )
+
+
+class TestIterRecords(unittest.TestCase):
+    """Test the streaming JSON reader of codec"""
+
+    def records(self, text, chunk_size):
+        """Return the records read from text in chunks of chunk_size"""
+        f = io.StringIO(text)
+        return list(codec.iter_records(f, chunk_size))
+
+    def test_matches_json_load(self):
+        """Test that iter_records reads what json.load reads"""
+        data = {
+            "State.1": {"name": "Café \"du\" {Nord}", "id": "1"},
+            "City.2": {"name": "a, b: c", "ids": [1, 2.5, None, True]},
+            "Place.3": {},
+        }
+        for indent in (None, 4):
+            text = json.dumps(data, indent=indent)
+            for chunk_size in (1, 7, 1 << 16):
+                with self.subTest(indent=indent, chunk_size=chunk_size):
+                    self.assertEqual(self.records(text, chunk_size),
+                                     list(data.items()))
+
+    def test_empty_object(self):
+        """Test that an empty JSON object has no records"""
+        self.assertEqual(self.records(" { } ", 1), [])
+
+    def test_invalid(self):
+        """Test that a truncated or non object file raises ValueError"""
+        for text in ('{"State.1": {"name": ', '[1, 2]', ''):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    self.records(text, 4)
+
+
+class TestCodecs(unittest.TestCase):
+    """Test the JSON and binary codecs"""
+
+    records = [
+        ("State.1", {"__class__": "State", "id": "1", "name": "Café",
+                     "created_at": "2017-09-28T21:05:54.119427",
+                     "updated_at": "2017-09-28T21:05:54.119572"}),
+        ("Place.2", {"__class__": "Place", "id": "2", "latitude": 37.77,
+                     "amenity_ids": ["a", "b"], "number_rooms": 3}),
+    ]
+
+    def round_trip(self, writer):
+        """Return the records written by writer and read back"""
+        f = io.BytesIO()
+        writer.write(f, self.records)
+        f.seek(0)
+        return [(key, {attr: value.strftime(codec.time)
+                       if isinstance(value, datetime) else value
+                       for attr, value in record.items()})
+                for key, record in codec.read(f)]
+
+    def test_json_round_trip(self):
+        """Test that the JSON codec reads back what it writes"""
+        self.assertEqual(self.round_trip(codec.get()), self.records)
+
+    def test_binary_round_trip(self):
+        """Test that the binary codec reads back what it writes with every
+        compressor"""
+        for compressor in codec.BinaryCodec.compressors:
+            with self.subTest(compressor=compressor):
+                writer = codec.get("binary", compressor)
+                self.assertEqual(self.round_trip(writer), self.records)
+
+    def test_binary_datetimes(self):
+        """Test that the binary codec reads datetimes back as datetimes"""
+        f = io.BytesIO()
+        codec.get("binary").write(f, self.records)
+        f.seek(0)
+        record = dict(codec.read(f))["State.1"]
+        self.assertEqual(record["created_at"],
+                         datetime(2017, 9, 28, 21, 5, 54, 119427))
+
+    def test_detect(self):
+        """Test that detect tells the codec a file was written with"""
+        for name in codec.codecs:
+            with self.subTest(name=name):
+                f = io.BytesIO()
+                codec.get(name).write(f, self.records)
+                f.seek(0)
+                self.assertEqual(codec.detect(f).name, name)
+                self.assertEqual(f.tell(), 0)
+
+    def test_unknown(self):
+        """Test that an unknown codec or compressor raises ValueError"""
+        with self.assertRaises(ValueError):
+            codec.get("xml")
+        with self.assertRaises(ValueError):
+            codec.get("binary", "zip")
+
+    def test_truncated(self):
+        """Test that a truncated binary file raises ValueError"""
+        f = io.BytesIO()
+        codec.get("binary").write(f, self.records)
+        f = io.BytesIO(f.getvalue()[:-1])
+        with self.assertRaises(ValueError):
+            list(codec.read(f))
+
+    def test_convert(self):
+        """Test that convert turns JSON into binary and back"""
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, name)
+                     for name in ("file.json", "file.bin", "back.json")]
+            with open(paths[0], "w") as f:
+                json.dump(dict(self.records), f)
+            codec.convert(paths[0], paths[1], codec.get("binary", "lzma"))
+            codec.convert(paths[1], paths[2], codec.get())
+            with open(paths[1], "rb") as f:
+                self.assertEqual(codec.detect(f).name, "binary")
+            with open(paths[2]) as f:
+                self.assertEqual(json.load(f), dict(self.records))
@@ -18,6 +18,7 @@ import json
 import os
 import pycodestyle as pep8
 import unittest
+from unittest import mock
 
 DBStorage = db_storage.DBStorage
 classes = {
@@ -87,6 +88,48 @@ test_db_storage.py"
             )
 
 
+class TestEngineOptions(unittest.TestCase):
+    """Test the engine options read from the environment"""
+
+    def test_defaults(self):
+        """Test that only pre-ping and recycle have defaults"""
+        with mock.patch.dict(os.environ):
+            for option in db_storage.pool_options.values():
+                os.environ.pop(option[0], None)
+            self.assertEqual(db_storage.engine_options(),
+                             {"pool_recycle": 3600, "pool_pre_ping": True})
+
+    def test_environment(self):
+        """Test that every option is read and converted"""
+        with mock.patch.dict(os.environ, {
+                "HBNB_DB_POOL_SIZE": "8", "HBNB_DB_MAX_OVERFLOW": "4",
+                "HBNB_DB_POOL_TIMEOUT": "2.5", "HBNB_DB_POOL_RECYCLE": "60",
+                "HBNB_DB_POOL_PRE_PING": "0"}):
+            self.assertEqual(db_storage.engine_options(), {
+                "pool_size": 8, "max_overflow": 4, "pool_timeout": 2.5,
+                "pool_recycle": 60, "pool_pre_ping": False})
+
+
+class TestQueryCacheOptions(unittest.TestCase):
+    """Test the query cache read from the environment"""
+
+    def test_disabled(self):
+        """Test that there is no cache unless classes are named"""
+        with mock.patch.dict(os.environ, {"HBNB_DB_CACHE": " "}):
+            self.assertIsNone(db_storage.query_cache())
+
+    def test_environment(self):
+        """Test that the classes and the TTL are read"""
+        with mock.patch.dict(os.environ, {"HBNB_DB_CACHE": "State, Amenity",
+                                          "HBNB_DB_CACHE_TTL": "5"}):
+            cache = db_storage.query_cache()
+        self.assertEqual(cache.names, {"State", "Amenity"})
+        self.assertEqual(cache.ttl, 5)
+        with mock.patch.dict(os.environ, {"HBNB_DB_CACHE": "Country"}):
+            with self.assertRaises(ValueError):
+                db_storage.query_cache()
+
+
 class TestDBStorage(unittest.TestCase):
     """Test the DBStorage class"""
 
@@ -119,7 +162,8 @@ class TestDBStorage(unittest.TestCase):
 
         session = models.storage._DBStorage__session
 
-        retrieved_state = session.query(State).filter_by(id=new_state).first()
+        retrieved_state = session.query(State).filter_by(
+            id=new_state.id).first()
 
         self.assertEqual(retrieved_state.id, new_state.id)
         self.assertEqual(retrieved_state.name, new_state.name)
@@ -137,7 +181,8 @@ class TestDBStorage(unittest.TestCase):
 
         session = models.storage._DBStorage__session
 
-        retrieved_state = session.query(State).filter_by(id=new_state).first()
+        retrieved_state = session.query(State).filter_by(
+            id=new_state.id).first()
 
         self.assertEqual(retrieved_state.id, new_state.id)
         self.assertEqual(retrieved_state.name, new_state.name)
@@ -187,4 +232,4 @@ class TestDBStorage(unittest.TestCase):
         self.assertEqual(state_occurrence, len(storage.all(State)))
 
         all_occurrnce = storage.count()
-        self.assertEqual(state_occurrence, len(storage.all()))
+        self.assertEqual(all_occurrnce, len(storage.all()))
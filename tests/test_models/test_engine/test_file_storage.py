@@ -4,9 +4,11 @@ Contains the TestFileStorageDocs classes
 """
 
 from datetime import datetime
+import heapq
 import inspect
 import models
-from models.engine import file_storage
+from models.engine import codec, file_storage
+from models.engine.lazy_objects import LazyObjects, PagedObjects
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -17,7 +19,13 @@ from models.user import User
 import json
 import os
 import pycodestyle as pep8
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 
 FileStorage = file_storage.FileStorage
 classes = {
@@ -182,4 +190,1030 @@ class TestFileStorage(unittest.TestCase):
         self.assertEqual(state_occurrence, len(storage.all(State)))
 
         all_occurrnce = storage.count()
-        self.assertEqual(state_occurrence, len(storage.all()))
+        self.assertEqual(all_occurrnce, len(storage.all()))
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_all_cls(self):
+        """Test that all(cls) returns only the objects of cls"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        state = State()
+        city = City()
+        storage.new(state)
+        storage.new(city)
+        key = "State." + state.id
+        self.assertEqual(storage.all(State), {key: state})
+        self.assertEqual(storage.all("State"), {key: state})
+        self.assertEqual(storage.all(Review), {})
+        storage.delete(state)
+        self.assertEqual(storage.all(State), {})
+        self.assertEqual(storage.all(City), {"City." + city.id: city})
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_all_cls_after_reload(self):
+        """Test that all(cls) sees the objects loaded by reload"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        state = State()
+        FileStorage._FileStorage__objects = {"State." + state.id: state}
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(list(storage.all(State)), ["State." + state.id])
+        self.assertEqual(storage.all(City), {})
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_get_by_key(self):
+        """Test that get finds an object by class and id"""
+        storage = FileStorage()
+        state = State()
+        storage.new(state)
+        self.assertIs(storage.get(State, state.id), state)
+        self.assertIs(storage.get("State", state.id), state)
+        self.assertIsNone(storage.get(City, state.id))
+        self.assertIsNone(storage.get(State, "fake_id"))
+        self.assertIsNone(storage.get(State, None))
+        storage.delete(state)
+        self.assertIsNone(storage.get(State, state.id))
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_count_all(self):
+        """Test that count and count_all follow new and delete"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        state = State()
+        storage.new(state)
+        storage.new(State())
+        storage.new(City())
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count(State), 2)
+        self.assertEqual(storage.count("City"), 1)
+        self.assertIsNone(storage.count(int))
+        storage.delete(state)
+        counts = storage.count_all()
+        self.assertEqual(set(counts), set(classes))
+        self.assertEqual(counts["State"], 1)
+        self.assertEqual(counts["City"], 1)
+        self.assertEqual(counts["Review"], 0)
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_related(self):
+        """Test that related follows foreign keys as they are reassigned"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        state_1 = State()
+        state_2 = State()
+        city = City(state_id=state_1.id)
+        for obj in (state_1, state_2, city):
+            storage.new(obj)
+        self.assertEqual(storage.related(City, "state_id", state_1.id),
+                         [city])
+        self.assertEqual(state_1.cities, [city])
+        city.state_id = state_2.id
+        self.assertEqual(state_1.cities, [])
+        self.assertEqual(state_2.cities, [city])
+        storage.delete(city)
+        self.assertEqual(state_2.cities, [])
+        state_1.name = "Nevada"
+        self.assertEqual(storage.related(State, "name", "Nevada"), [state_1])
+        FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == "db", "not testing file storage")
+    def test_related_after_reload(self):
+        """Test that the relation indexes are rebuilt by reload"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        place = Place()
+        review = Review(place_id=place.id)
+        FileStorage._FileStorage__objects = {"Place." + place.id: place,
+                                             "Review." + review.id: review}
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        reloaded = storage.get(Place, place.id)
+        self.assertEqual([r.id for r in reloaded.reviews], [review.id])
+        FileStorage._FileStorage__objects = save
+
+
+class TempFileStorage(unittest.TestCase):
+    """Base class of the tests run against a FileStorage in a temp dir"""
+
+    # FileStorage class attributes the tests may change
+    attributes = ("file_path", "objects", "journal", "journal_limit",
+                  "durability", "fsync_interval", "codec", "encoded_cache")
+
+    def setUp(self):
+        """Point FileStorage at an empty file"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "file.json")
+        self.saved = {attr: getattr(FileStorage, "_FileStorage__" + attr)
+                      for attr in self.attributes}
+        FileStorage._FileStorage__file_path = self.path
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = {}
+        self.storage = FileStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """Restore the FileStorage class attributes"""
+        if FileStorage._FileStorage__compactor is not None:
+            FileStorage._FileStorage__compactor.join()
+        for attr, value in self.saved.items():
+            setattr(FileStorage, "_FileStorage__" + attr, value)
+        self.tmp.cleanup()
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageJournal(TempFileStorage):
+    """Test the journal mode of the FileStorage class"""
+
+    def setUp(self):
+        """Point FileStorage at an empty file in journal mode"""
+        super().setUp()
+        FileStorage._FileStorage__journal = True
+
+    def journal(self):
+        """Return the lines of the journal"""
+        with open(self.path + ".journal") as f:
+            return f.readlines()
+
+    def test_save_appends_changes(self):
+        """Test that save only appends the changed objects"""
+        state = State(name="Texas")
+        city = City(state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        self.assertEqual(len(self.journal()), 2)
+        self.assertFalse(os.path.exists(self.path))
+        state.name = "Ohio"
+        self.storage.delete(city)
+        self.storage.save()
+        self.assertEqual(len(self.journal()), 4)
+        self.storage.save()
+        self.assertEqual(len(self.journal()), 4)
+
+    def test_reload_replays_journal(self):
+        """Test that reload applies the journal in order"""
+        state = State(name="Texas")
+        city = City(state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        state.name = "Ohio"
+        self.storage.delete(city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all()), ["State." + state.id])
+        self.assertEqual(self.storage.get(State, state.id).name, "Ohio")
+
+    def test_compaction(self):
+        """Test that a full journal is merged into the JSON file"""
+        state = State(name="Texas")
+        self.storage.new(state)
+        self.storage.save()
+        FileStorage._FileStorage__journal_limit = 0
+        state.name = "Ohio"
+        self.storage.save()
+        FileStorage._FileStorage__compactor.join()
+        self.assertFalse(os.path.exists(self.path + ".journal.old"))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["State." + state.id]["name"],
+                             "Ohio")
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, state.id).name, "Ohio")
+
+    def test_save_without_journal(self):
+        """Test that a full save replaces the journal"""
+        state = State()
+        self.storage.new(state)
+        self.storage.save()
+        FileStorage._FileStorage__journal = False
+        self.storage.save()
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        with open(self.path) as f:
+            self.assertIn("State." + state.id, json.load(f))
+
+    def test_reload_unchanged(self):
+        """Test that reload keeps the objects when no file changed"""
+        state = State()
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.reload()
+        self.assertIs(self.storage.get(State, state.id), state)
+        FileStorage._FileStorage__journal = False
+        self.storage.save()
+        self.storage.reload()
+        self.assertIs(self.storage.get(State, state.id), state)
+
+    def test_reload_external_entries(self):
+        """Test that reload only applies the entries of another writer"""
+        state = State()
+        self.storage.new(state)
+        self.storage.save()
+        city = City(name="Austin")
+        with open(self.path + ".journal", "a") as f:
+            f.write(json.dumps(["City." + city.id, city.to_dict()]) + "\n")
+            f.write(json.dumps(["State." + state.id, None]) + "\n")
+            f.write('["City.torn", {"name"')
+        self.storage.reload()
+        self.assertEqual(self.storage.get(City, city.id).name, "Austin")
+        self.assertIsNone(self.storage.get(State, state.id))
+        with open(self.path + ".journal", "a") as f:
+            f.write(': "Dallas", "id": "torn", "__class__": "City"}]\n')
+        self.storage.reload()
+        self.assertEqual(self.storage.get(City, "torn").name, "Dallas")
+
+    def test_reload_external_rewrite(self):
+        """Test that reload reads a JSON file rewritten by another writer"""
+        self.storage.new(State())
+        self.storage.save()
+        state = State(name="Utah")
+        with open(self.path, "w") as f:
+            json.dump({"State." + state.id: state.to_dict()}, f)
+        os.remove(self.path + ".journal")
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, state.id).name, "Utah")
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageCommit(TempFileStorage):
+    """Test how the FileStorage class writes its changes"""
+
+    def test_save_is_atomic(self):
+        """Test that save leaves no temporary file behind"""
+        self.storage.new(State())
+        self.storage.save()
+        self.assertEqual(sorted(os.listdir(self.tmp.name)),
+                         ["file.json", "file.json.lock"])
+
+    def test_group_commit(self):
+        """Test that concurrent saves are grouped into fewer writes"""
+        writes = []
+        write = FileStorage._FileStorage__write
+
+        def slow_write(storage, objects):
+            """Write after a delay that lets other saves queue up"""
+            writes.append(len(objects))
+            time.sleep(0.1)
+            write(storage, objects)
+
+        def create():
+            """Create and save a State"""
+            self.storage.new(State())
+            self.storage.save()
+
+        FileStorage._FileStorage__write = slow_write
+        try:
+            threads = [threading.Thread(target=create) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            FileStorage._FileStorage__write = write
+        self.assertLess(len(writes), 8)
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 8)
+
+    def test_save_encodes_changes(self):
+        """Test that save encodes again only the objects changed since the
+        last one with the cache of encoded records"""
+        FileStorage._FileStorage__encoded_cache = True
+        states = [State(name="state_{}".format(i)) for i in range(5)]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        codec = FileStorage._FileStorage__codec
+        with mock.patch.object(codec, "encode", wraps=codec.encode) as encode:
+            self.storage.save()
+            self.assertEqual(encode.call_count, 0)
+            states[0].name = "Iowa"
+            self.storage.delete(states[1])
+            self.storage.new(State(name="new"))
+            self.storage.save()
+            self.assertEqual(encode.call_count, 2)
+            states[2].__dict__["name"] = "changed in place"
+            self.storage.new(states[2])
+            self.storage.save()
+            self.assertEqual(encode.call_count, 3)
+        with open(self.path) as f:
+            names = sorted(record["name"] for record in json.load(f).values())
+        self.assertEqual(names, ["Iowa", "changed in place", "new",
+                                 "state_3", "state_4"])
+
+    def test_save_changed_in_place(self):
+        """Test that save writes the objects changed in place without the
+        cache of encoded records, which is off by default"""
+        place = Place(name="Loft")
+        self.storage.new(place)
+        self.storage.save()
+        place.amenity_ids = []
+        self.storage.save()
+        place.amenity_ids.append("a1")
+        self.storage.save()
+        with open(self.path) as f:
+            record = json.load(f)["Place." + place.id]
+        self.assertEqual(record["amenity_ids"], ["a1"])
+
+    def test_durability(self):
+        """Test that only the fsync durability syncs on every save"""
+        for durability, syncs in (("buffered", False), ("fsync", True)):
+            for journal in (False, True):
+                with self.subTest(durability=durability, journal=journal):
+                    FileStorage._FileStorage__durability = durability
+                    FileStorage._FileStorage__journal = journal
+                    self.storage.new(State())
+                    with mock.patch("os.fsync") as fsync:
+                        self.storage.save()
+                    self.assertEqual(fsync.called, syncs)
+
+    def test_interval_durability(self):
+        """Test that the interval durability syncs after a delay"""
+        FileStorage._FileStorage__durability = "interval"
+        FileStorage._FileStorage__fsync_interval = 0.05
+        self.storage.new(State())
+        with mock.patch("os.fsync") as fsync:
+            self.storage.save()
+            self.assertFalse(fsync.called)
+            FileStorage._FileStorage__syncer.join()
+        self.assertTrue(fsync.called)
+
+    def test_binary_codec(self):
+        """Test that a binary snapshot is read back, and rewritten as JSON
+        once the codec is switched back"""
+        FileStorage._FileStorage__codec = codec.get("binary", "zlib")
+        state = State(name="Utah")
+        self.storage.new(state)
+        self.storage.save()
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(4), codec.BinaryCodec.MAGIC)
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        loaded = self.storage.get(State, state.id)
+        self.assertEqual(loaded.to_dict(), state.to_dict())
+        FileStorage._FileStorage__codec = codec.get()
+        self.storage.save()
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["State." + state.id]["name"],
+                             "Utah")
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageLazy(TempFileStorage):
+    """Test the lazy mode of the FileStorage class"""
+
+    def setUp(self):
+        """Write a file of a State, its Cities and Users, and reload it in
+        lazy mode with room for two instances"""
+        super().setUp()
+        self.state = State(name="Ohio")
+        self.cities = [City(name="city_{}".format(i), state_id=self.state.id)
+                       for i in range(3)]
+        self.users = [User(email="user_{}".format(i)) for i in range(3)]
+        for obj in [self.state] + self.cities + self.users:
+            self.storage.new(obj)
+        self.storage.save()
+        self.objects = self.make_objects()
+        FileStorage._FileStorage__objects = self.objects
+        self.storage.reload()
+
+    def make_objects(self):
+        """Return the __objects of the mode tested"""
+        return LazyObjects(file_storage.build, 2)
+
+    def test_reload_builds_nothing(self):
+        """Test that reload keeps records and builds no instance"""
+        self.assertEqual(self.storage.count(), 7)
+        self.assertEqual(self.storage.count(City), 3)
+        self.assertEqual(self.objects.loads, 0)
+
+    def test_get(self):
+        """Test that get builds an instance once and keeps it"""
+        state = self.storage.get(State, self.state.id)
+        self.assertIsInstance(state, State)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+        self.assertIs(self.storage.get(State, self.state.id), state)
+        self.assertEqual(self.objects.loads, 1)
+
+    def test_lru(self):
+        """Test that the cache holds at most size instances, and that an
+        instance still referenced is not built twice"""
+        user = self.storage.get(User, self.users[0].id)
+        for obj in self.users[1:]:
+            self.storage.get(User, obj.id)
+        self.assertEqual(len(self.objects.cache), 2)
+        self.assertNotIn("User." + user.id, self.objects.cache)
+        self.assertIs(self.storage.get(User, user.id), user)
+        self.assertEqual(self.objects.loads, 3)
+
+    def test_all_and_related(self):
+        """Test that all and the relationships return instances"""
+        cities = self.storage.all(City)
+        self.assertEqual(sorted(obj.name for obj in cities.values()),
+                         ["city_0", "city_1", "city_2"])
+        state = self.storage.get(State, self.state.id)
+        self.assertEqual(len(state.cities), 3)
+        self.assertTrue(all(type(obj) is City for obj in state.cities))
+        self.assertEqual(len(list(self.storage.all().values())), 7)
+
+    def test_change_survives_eviction(self):
+        """Test that a changed instance is saved after it left the cache"""
+        user = self.storage.get(User, self.users[0].id)
+        user.first_name = "Ada"
+        for obj in self.users[1:]:
+            self.storage.get(User, obj.id)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(User, user.id).first_name, "Ada")
+        self.assertEqual(self.storage.count(), 7)
+
+    def test_save_releases_instances(self):
+        """Test that at most size instances stay in memory once the new
+        and changed ones are saved, and that they are not built twice"""
+        places = [Place(name="place_{}".format(i)) for i in range(10)]
+        for obj in places:
+            self.storage.new(obj)
+        user = self.storage.get(User, self.users[0].id)
+        user.first_name = "Ada"
+        self.storage.save()
+        resident = [key for key, value in dict.items(self.objects)
+                    if type(value) is not self.objects.placeholder]
+        self.assertEqual(resident, [])
+        self.assertLessEqual(len(self.objects.cache), 2)
+        self.assertIs(self.storage.get(User, user.id), user)
+        self.assertIs(self.storage.get(Place, places[0].id), places[0])
+        places[0].name = "changed"
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(User, user.id).first_name, "Ada")
+        self.assertEqual(self.storage.get(Place, places[0].id).name,
+                         "changed")
+        self.assertEqual(self.storage.count(), 17)
+
+    def test_append_releases_instances(self):
+        """Test that appending the changes to the journal also leaves the
+        instances saved to the cache"""
+        FileStorage._FileStorage__journal = True
+        places = [Place(name="place_{}".format(i)) for i in range(10)]
+        for obj in places:
+            self.storage.new(obj)
+        self.storage.save()
+        self.assertTrue(os.path.exists(self.path + ".journal"))
+        self.assertTrue(all(type(value) is self.objects.placeholder
+                            for value in dict.values(self.objects)))
+        self.assertLessEqual(len(self.objects.cache), 2)
+
+    def test_save_builds_nothing(self):
+        """Test that save writes the records without building them"""
+        self.storage.delete(self.storage.get(City, self.cities[0].id))
+        self.storage.save()
+        self.assertEqual(self.objects.loads, 1)
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 6)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStoragePaged(TestFileStorageLazy):
+    """Test the paged mode of the FileStorage class"""
+
+    def make_objects(self):
+        """Return a PagedObjects of tiny pages and budget"""
+        return PagedObjects(file_storage.build, 2, budget=400, page_size=200)
+
+    def test_records_are_spilled(self):
+        """Test that the records are stored as locators into pages"""
+        key = "State." + self.state.id
+        self.assertIs(type(dict.get(self.objects, key)), int)
+        self.assertGreater(len(self.objects.pages), 1)
+
+    def test_save_spills_instances(self):
+        """Test that the instances saved are spilled to the pages"""
+        spilled = self.objects.spilled
+        places = [Place(name="place_{}".format(i)) for i in range(10)]
+        for obj in places:
+            self.storage.new(obj)
+        self.storage.save()
+        self.assertGreater(self.objects.spilled, spilled)
+        for obj in places:
+            key = "Place." + obj.id
+            self.assertIs(type(dict.get(self.objects, key)), int)
+            self.assertEqual(self.objects.stored(key)["name"], obj.name)
+
+    def test_budget(self):
+        """Test that the pages in memory stay within the budget"""
+        for obj in self.users + self.cities:
+            self.storage.get(type(obj), obj.id)
+        self.assertLessEqual(self.objects.resident_size, 400)
+        self.assertGreater(self.objects.reads, 0)
+
+    def test_collect(self):
+        """Test that reloading a changed file does not grow the pages
+        forever"""
+        for i in range(50):
+            with open(self.path) as f:
+                records = json.load(f)
+            records["State." + self.state.id]["name"] = str(i)
+            with open(self.path, "w") as f:
+                json.dump(records, f)
+            self.storage.reload()
+        self.assertEqual(self.storage.get(State, self.state.id).name, "49")
+        self.assertLess(self.objects.spilled,
+                        self.objects.stored_size + (200 << 4) + 200 * 7)
+        self.assertEqual(self.storage.count(), 7)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageSnapshots(TempFileStorage):
+    """Test that readers of all() iterate snapshots while writers go on"""
+
+    def test_all_is_snapshot(self):
+        """Test that all() is not changed by later changes"""
+        state = State()
+        self.storage.new(state)
+        objects = self.storage.all()
+        states = self.storage.all(State)
+        other = State()
+        self.storage.new(other)
+        self.storage.delete(state)
+        self.assertEqual(list(objects), ["State." + state.id])
+        self.assertEqual(list(states), ["State." + state.id])
+        self.assertEqual(list(self.storage.all()), ["State." + other.id])
+        self.assertEqual(list(self.storage.all(State)),
+                         ["State." + other.id])
+
+    def test_unread_changes_in_place(self):
+        """Test that changes not seen by a reader copy nothing"""
+        self.storage.new(State())
+        objects = FileStorage._FileStorage__objects
+        self.storage.new(State())
+        self.assertIs(FileStorage._FileStorage__objects, objects)
+
+    def stress(self, consistent):
+        """Run readers iterating all() and all(cls) while writers add and
+        delete objects, and return the errors raised"""
+        errors = []
+        reads = []
+        done = threading.Event()
+        for i in range(100):
+            self.storage.new(State(name="state_{}".format(i)))
+
+        def read():
+            """Iterate snapshots until the writers are done"""
+            try:
+                while not done.is_set():
+                    objects = self.storage.all()
+                    keys = list(objects)
+                    values = list(objects.values())
+                    states = self.storage.all(State)
+                    names = [obj.name for obj in states.values()]
+                    if consistent:
+                        self.assertEqual(len(keys), len(values))
+                        self.assertEqual(keys, list(objects))
+                        self.assertEqual(len(names), len(states))
+                        for key, obj in zip(keys, values):
+                            self.assertEqual(key.split(".")[1], obj.id)
+                    reads.append(len(keys))
+            except Exception as e:
+                errors.append(e)
+
+        def write():
+            """Add States with a City each, and delete half of them"""
+            try:
+                for i in range(100):
+                    state = State(name="new")
+                    self.storage.new(state)
+                    self.storage.new(City(state_id=state.id))
+                    if i % 2:
+                        self.storage.delete(state)
+                    if i % 50 == 0:
+                        self.storage.save()
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for i in range(6)]
+        writers = [threading.Thread(target=write) for i in range(4)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+        self.assertTrue(reads)
+        self.assertEqual(self.storage.count(State), 100 + 4 * 50)
+        self.assertEqual(self.storage.count(City), 4 * 100)
+        self.assertEqual(len(self.storage.all(State)), 100 + 4 * 50)
+        return errors
+
+    def test_stress(self):
+        """Test that readers always see consistent snapshots"""
+        self.assertEqual(self.stress(True), [])
+
+    def test_stress_lazy(self):
+        """Test that iterating all() in lazy mode never fails"""
+        FileStorage._FileStorage__objects = LazyObjects(file_storage.build)
+        self.assertEqual(self.stress(False), [])
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageProcesses(TempFileStorage):
+    """Test FileStorage instances of several processes sharing a file"""
+
+    # run by each process before its code, with the file path and the
+    # journal mode as arguments
+    prelude = "\n".join([
+        "import sys",
+        "from models.engine.file_storage import FileStorage",
+        "from models.state import State",
+        "FileStorage._FileStorage__file_path = sys.argv[1]",
+        "FileStorage._FileStorage__journal = sys.argv[2] == '1'",
+        "storage = FileStorage()",
+        "storage.reload()",
+        "",
+    ])
+
+    def start(self, code, journal=False):
+        """Start a process running code against the file"""
+        root = os.path.dirname(os.path.dirname(
+            os.path.abspath(models.__file__)))
+        env = dict(os.environ, PYTHONPATH=root,
+                   HBNB_FILE_JOURNAL_LIMIT="2000",
+                   HBNB_FILE_CODEC=FileStorage._FileStorage__codec.name)
+        env.pop("HBNB_TYPE_STORAGE", None)
+        return subprocess.Popen(
+            [sys.executable, "-c", self.prelude + code, self.path,
+             "1" if journal else "0"], cwd=self.tmp.name, env=env)
+
+    def test_no_lost_writes(self):
+        """Test that processes saving at the same time lose no object"""
+        code = "\n".join([
+            "for i in range(20):",
+            "    storage.new(State(name='state'))",
+            "    storage.save()",
+        ])
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                FileStorage._FileStorage__journal = journal
+                workers = [self.start(code, journal) for i in range(4)]
+                for worker in workers:
+                    self.assertEqual(worker.wait(), 0)
+                self.storage.reload()
+                count = 80 if not journal else 160
+                self.assertEqual(self.storage.count(State), count)
+
+    def test_reload_external_changes(self):
+        """Test that reload takes in the changes of another process and
+        keeps the unchanged and unsaved objects"""
+        states = [State(name="state_{}".format(i)) for i in range(3)]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        unsaved = State(name="unsaved")
+        self.storage.new(unsaved)
+        code = "\n".join([
+            "storage.delete(storage.get(State, '{}'))".format(states[0].id),
+            "storage.get(State, '{}').name = 'new'".format(states[1].id),
+            "storage.save()",
+        ])
+        self.assertEqual(self.start(code).wait(), 0)
+        self.storage.reload()
+        self.assertIsNone(self.storage.get(State, states[0].id))
+        self.assertEqual(self.storage.get(State, states[1].id).name, "new")
+        self.assertIs(self.storage.get(State, states[2].id), states[2])
+        self.assertIs(self.storage.get(State, unsaved.id), unsaved)
+        self.storage.save()
+        with open(self.path, "rb") as f:
+            self.assertEqual(len(list(codec.read(f))), 3)
+
+    def test_reload_external_changes_binary(self):
+        """Test that reload keeps the unchanged objects of a binary file,
+        whose records hold datetimes rather than strings"""
+        FileStorage._FileStorage__codec = codec.get("binary")
+        self.test_reload_external_changes()
+        with open(self.path, "rb") as f:
+            self.assertEqual(codec.detect(f).name, "binary")
+
+    def test_generation(self):
+        """Test that every save increments the generation"""
+        self.storage.new(State())
+        self.storage.save()
+        generation = FileStorage._FileStorage__generation
+        self.assertEqual(self.start("storage.save()").wait(), 0)
+        with file_storage.locked(self.path + ".lock") as fd:
+            self.assertEqual(file_storage.read_generation(fd),
+                             generation + 1)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageTransactions(TempFileStorage):
+    """Test the transactions of the FileStorage class"""
+
+    def setUp(self):
+        """Write a file of a State and one of its Cities and reload it"""
+        super().setUp()
+        state = State(name="Ohio")
+        city = City(name="Akron", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = self.make_objects()
+        self.storage.reload()
+        self.state = self.storage.get(State, state.id)
+        self.city = self.storage.get(City, city.id)
+        with open(self.path, "rb") as f:
+            self.saved_file = f.read()
+
+    def make_objects(self):
+        """Return the __objects of the mode tested"""
+        return {}
+
+    def test_commit_writes_once(self):
+        """Test that the changes of a transaction are written once, when
+        it ends"""
+        writes = []
+        write = FileStorage._FileStorage__write
+
+        def count_write(storage, objects):
+            """Count the writes"""
+            writes.append(len(objects))
+            write(storage, objects)
+
+        with mock.patch.object(FileStorage, "_FileStorage__write",
+                               count_write):
+            with self.storage.transaction():
+                for i in range(3):
+                    State(name="state_{}".format(i)).save()
+                self.state.name = "Iowa"
+                self.storage.save()
+                with open(self.path, "rb") as f:
+                    self.assertEqual(f.read(), self.saved_file)
+        self.assertEqual(writes, [5])
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.count(State), 4)
+        self.assertEqual(self.storage.get(State, self.state.id).name, "Iowa")
+
+    def test_rollback(self):
+        """Test that a transaction that raises undoes its changes"""
+        state = State(name="Utah")
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                self.state.name = "Iowa"
+                self.state.capital = "Des Moines"
+                self.city.state_id = "other"
+                self.storage.new(state)
+                self.storage.delete(self.city)
+                raise ValueError()
+        self.assertEqual(self.state.name, "Ohio")
+        self.assertNotIn("capital", self.state.__dict__)
+        self.assertEqual(self.city.state_id, self.state.id)
+        self.assertIsNone(self.storage.get(State, state.id))
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual([city.id for city in self.state.cities],
+                         [self.city.id])
+        self.assertEqual(FileStorage._FileStorage__dirty, {})
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), self.saved_file)
+
+    def test_rollback_keeps_earlier_changes(self):
+        """Test that a rollback keeps the changes made before the
+        transaction, still to be saved"""
+        self.state.name = "Iowa"
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                self.state.name = "Utah"
+                raise ValueError()
+        self.assertEqual(self.state.name, "Iowa")
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(State, self.state.id).name, "Iowa")
+
+    def test_nested(self):
+        """Test that a transaction opened in another one is part of it"""
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                with self.storage.transaction():
+                    self.state.name = "Iowa"
+                with open(self.path, "rb") as f:
+                    self.assertEqual(f.read(), self.saved_file)
+                raise ValueError()
+        self.assertEqual(self.state.name, "Ohio")
+
+    def test_saves_wait(self):
+        """Test that the saves of other threads do not write a transaction
+        before it ends"""
+        with self.storage.transaction():
+            self.state.name = "Iowa"
+            saver = threading.Thread(target=self.storage.save)
+            saver.start()
+            saver.join(0.2)
+            self.assertTrue(saver.is_alive())
+            with open(self.path, "rb") as f:
+                self.assertEqual(f.read(), self.saved_file)
+        saver.join()
+        with open(self.path) as f:
+            self.assertEqual(
+                json.load(f)["State." + self.state.id]["name"], "Iowa")
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageTransactionsLazy(TestFileStorageTransactions):
+    """Test the transactions of the lazy mode of the FileStorage class"""
+
+    def make_objects(self):
+        """Return a LazyObjects with room for one instance"""
+        return LazyObjects(file_storage.build, 1)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageQuery(TempFileStorage):
+    """Test the queries of the FileStorage class"""
+
+    def setUp(self):
+        """Write a file of Places in two Cities and reload it"""
+        super().setUp()
+        self.cities = [City(name="city_{}".format(i)) for i in range(2)]
+        for i in range(6):
+            self.storage.new(Place(name="place_{}".format(i),
+                                   city_id=self.cities[i % 2].id,
+                                   price_by_night=100 * (i // 2)))
+        self.storage.new(Place(name="no price", city_id=self.cities[0].id))
+        for city in self.cities:
+            self.storage.new(city)
+        self.storage.save()
+        FileStorage._FileStorage__objects = self.make_objects()
+        self.storage.reload()
+
+    def make_objects(self):
+        """Return the __objects of the mode tested"""
+        return {}
+
+    def names(self, query):
+        """Return the names of the objects of query"""
+        return [obj.name for obj in query]
+
+    def test_filter(self):
+        """Test conditions on foreign keys and other attributes"""
+        query = self.storage.query(Place)
+        self.assertEqual(query.count(), 7)
+        city_0 = query.filter(city_id=self.cities[0].id)
+        self.assertEqual(sorted(self.names(city_0)),
+                         ["no price", "place_0", "place_2", "place_4"])
+        cheap = city_0.filter(price_by_night__lte=100)
+        self.assertEqual(sorted(self.names(cheap)),
+                         ["no price", "place_0", "place_2"])
+        self.assertEqual(query.filter(price_by_night__gt=100).count(), 2)
+        self.assertEqual(query.filter(name__in=["place_1", "x"]).count(), 1)
+        self.assertEqual(query.filter(city_id="fake").all(), [])
+
+    def test_filter_by_id(self):
+        """Test that conditions on the id look the keys up"""
+        place = self.storage.query(Place).filter(name="place_3").first()
+        self.assertIs(self.storage.query(Place).filter(id=place.id).first(),
+                      place)
+        self.assertIsNone(
+            self.storage.query(City).filter(id=place.id).first())
+
+    def test_order_limit_offset(self):
+        """Test the ordering and the window of the results"""
+        query = self.storage.query("Place").filter(price_by_night__ne=0)
+        query = query.order_by("-price_by_night", "name")
+        self.assertEqual(self.names(query),
+                         ["place_4", "place_5", "place_2", "place_3"])
+        self.assertEqual(self.names(query.limit(2).offset(1)),
+                         ["place_5", "place_2"])
+        self.assertEqual(query.limit(2).offset(3).count(), 1)
+
+    def test_after(self):
+        """Test that after() keeps the objects past a keyset"""
+        query = self.storage.query(Place).order_by("-price_by_night", "name")
+        self.assertEqual(self.names(query.after(200, "place_4")),
+                         ["place_5", "place_2", "place_3", "no price",
+                          "place_0", "place_1"])
+        self.assertEqual(self.names(query.after(100, "place_3").limit(2)),
+                         ["no price", "place_0"])
+
+    def test_pages(self):
+        """Test that pages() walks every object once, in order"""
+        query = self.storage.query(Place).order_by("created_at")
+        pages = list(query.pages(3))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        objs = [obj for page in pages for obj in page]
+        self.assertEqual(objs, query.order_by("id").all())
+        self.assertEqual(len(set(obj.id for obj in objs)), 7)
+
+    def test_created_index(self):
+        """Test that the pages in (created_at, id) order follow the new,
+        changed and deleted objects"""
+        def walk(query):
+            """Return the ids of the pages of query, 2 at a time"""
+            return [obj.id for page in query.pages(2) for obj in page]
+
+        def expected(query):
+            """Return the ids of the objects of query sorted by created_at
+            and id"""
+            return [obj.id for obj in sorted(
+                query, key=lambda obj: (obj.created_at, obj.id))]
+
+        query = self.storage.query(Place).order_by("created_at", "id")
+        self.assertEqual(walk(query), expected(query.all()))
+        places = query.all()
+        first = Place(name="first", created_at=datetime(2000, 1, 1))
+        self.storage.new(first)
+        places[0].created_at = datetime(2100, 1, 1)
+        places[1].created_at = places[2].created_at
+        self.storage.delete(places[3])
+        ids = walk(query)
+        self.assertEqual(ids, expected(self.storage.all(Place).values()))
+        self.assertEqual(ids[0], first.id)
+        self.assertEqual(ids[-1], places[0].id)
+        self.assertNotIn(places[3].id, ids)
+        priced = query.filter(price_by_night__ne=0)
+        self.assertEqual(walk(priced), expected(priced.order_by().all()))
+
+    def test_page_reads_page(self):
+        """Test that a page of the created_at index or of any ordering with
+        a limit reads only about its objects, and holds only them"""
+        for i in range(500):
+            self.storage.new(State(name="state_{}".format(i % 50)))
+        query = self.storage.query(State).order_by("created_at", "id")
+        middle = query.limit(250).all()[-1]
+        with mock.patch.object(file_storage, "stored_value",
+                               wraps=file_storage.stored_value) as read:
+            page = query.after(*query.key_of(middle)).limit(5).all()
+        self.assertEqual(len(page), 5)
+        self.assertLess(read.call_count, 50)
+        ordered = self.storage.query(State).order_by("-name", "id")
+        with mock.patch.object(heapq, "nsmallest",
+                               wraps=heapq.nsmallest) as nsmallest:
+            page = ordered.limit(3).all()
+        self.assertEqual(nsmallest.call_args[0][0], 3)
+        states = sorted(self.storage.all(State).values(),
+                        key=lambda state: state.id)
+        states.sort(key=lambda state: state.name, reverse=True)
+        self.assertEqual(page, states[:3])
+
+    def test_iter(self):
+        """Test that iter walks every object of a class, or every object,
+        and that queries iterate within their window"""
+        self.assertEqual(sorted(obj.name for obj in self.storage.iter(
+            Place, batch_size=2)), sorted(self.names(
+                self.storage.query(Place))))
+        self.assertEqual(len(list(self.storage.iter())), 9)
+        query = self.storage.query(Place).filter(city_id=self.cities[1].id)
+        self.assertEqual(len(list(query.iter(2))), 3)
+        self.assertEqual(len(list(query.limit(2).offset(2).iter(1))), 1)
+        ordered = query.order_by("-name")
+        self.assertEqual([obj.name for obj in ordered.iter(2)],
+                         ["place_5", "place_3", "place_1"])
+
+    def test_unknown_class(self):
+        """Test that a query of an unknown class finds nothing"""
+        self.assertEqual(self.storage.query("Unknown").all(), [])
+
+    def test_follows_changes(self):
+        """Test that queries see the changes not saved yet"""
+        place = self.storage.query(Place).filter(name="place_0").first()
+        place.city_id = self.cities[1].id
+        self.assertEqual(
+            self.storage.query(Place).filter(
+                city_id=self.cities[1].id).count(), 4)
+
+
+@unittest.skipIf(models.storage_t == "db", "not testing file storage")
+class TestFileStorageQueryLazy(TestFileStorageQuery):
+    """Test the queries of the lazy mode of the FileStorage class"""
+
+    def make_objects(self):
+        """Return a LazyObjects with room for two instances"""
+        return LazyObjects(file_storage.build, 2)
+
+    def test_builds_results_only(self):
+        """Test that a query builds only the objects it returns"""
+        objects = FileStorage._FileStorage__objects
+        query = self.storage.query(Place).filter(price_by_night__gte=200)
+        self.assertEqual(query.count(), 2)
+        self.assertEqual(objects.loads, 0)
+        self.assertEqual(len(query.all()), 2)
+        self.assertEqual(objects.loads, 2)
+
+    def test_iter_builds_batches(self):
+        """Test that iter builds the objects a batch at a time"""
+        objects = FileStorage._FileStorage__objects
+        walk = self.storage.iter(Place, batch_size=2)
+        next(walk)
+        self.assertEqual(objects.loads, 2)
+        self.assertEqual(len(list(walk)), 6)
+        self.assertEqual(objects.loads, 7)
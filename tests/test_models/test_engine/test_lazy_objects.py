@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+"""
+Contains the TestLazyObjectsDocs and TestLazyObjects classes
+"""
+
+import inspect
+from models.engine import lazy_objects
+import pycodestyle as pep8
+import unittest
+
+LazyObjects = lazy_objects.LazyObjects
+PagedObjects = lazy_objects.PagedObjects
+
+
+class Thing:
+    """Stand-in for a model built from a record"""
+
+    def __init__(self, **kwargs):
+        """Copy the record into the instance"""
+        self.__dict__.update(kwargs)
+
+
+class TestLazyObjectsDocs(unittest.TestCase):
+    """Tests to check the documentation and style of LazyObjects class"""
+
+    def test_pep8_conformance_lazy_objects(self):
+        """Test that models/engine/lazy_objects.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(["models/engine/lazy_objects.py"])
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_pep8_conformance_test_lazy_objects(self):
+        """Test tests/test_models/test_lazy_objects.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(
+            ["tests/test_models/test_engine/test_lazy_objects.py"]
+        )
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_lazy_objects_docstrings(self):
+        """Test for the module, class and method docstrings"""
+        self.assertTrue(len(lazy_objects.__doc__) >= 1)
+        for cls in (LazyObjects, PagedObjects):
+            self.assertTrue(len(cls.__doc__) >= 1)
+            for name, func in inspect.getmembers(cls, inspect.isfunction):
+                self.assertTrue(func.__doc__,
+                                "{:s} method needs a docstring".format(name))
+
+
+class TestLazyObjects(unittest.TestCase):
+    """Test the LazyObjects class"""
+
+    def setUp(self):
+        """Store three records"""
+        self.objects = self.make_objects(lambda record: Thing(**record))
+        for i in range(3):
+            self.objects["Thing.{}".format(i)] = {"id": str(i)}
+
+    def make_objects(self, load):
+        """Return the dictionary tested"""
+        return LazyObjects(load, 2)
+
+    def test_copies_build(self):
+        """Test that copies and views hold instances, not records"""
+        for copy in (dict(self.objects), {**self.objects},
+                     self.objects.copy()):
+            self.assertTrue(all(type(obj) is Thing for obj in copy.values()))
+        self.assertTrue(all(type(obj) is Thing
+                            for obj in self.objects.values()))
+        key, obj = next(iter(self.objects.items()))
+        self.assertIs(obj, self.objects[key])
+
+    def test_peek(self):
+        """Test that peek never builds an instance"""
+        self.assertIsNone(self.objects.peek("Thing.0"))
+        obj = self.objects["Thing.0"]
+        self.assertIs(self.objects.peek("Thing.0"), obj)
+        self.assertEqual(self.objects.loads, 1)
+
+    def test_set_and_pop(self):
+        """Test that setting or popping a key drops its built instance"""
+        obj = self.objects["Thing.0"]
+        self.objects["Thing.0"] = {"id": "0", "name": "new"}
+        self.assertIsNot(self.objects["Thing.0"], obj)
+        self.assertEqual(self.objects["Thing.0"].name, "new")
+        self.assertEqual(self.objects.stored("Thing.1"), {"id": "1"})
+        self.objects.pop("Thing.1")
+        self.assertIsNone(self.objects.get("Thing.1"))
+
+    def test_release(self):
+        """Test that a released instance is stored as its record, stays the
+        instance of its key and is evicted as a built one"""
+        obj = Thing(id="3")
+        self.objects["Thing.3"] = obj
+        self.objects.release("Thing.3", {"id": "3"})
+        self.assertEqual(self.objects.stored("Thing.3"), {"id": "3"})
+        self.assertIs(self.objects["Thing.3"], obj)
+        self.objects["Thing.0"]
+        self.objects["Thing.1"]
+        self.assertNotIn("Thing.3", self.objects.cache)
+        self.assertIs(self.objects["Thing.3"], obj)
+        self.assertEqual(self.objects.loads, 2)
+
+
+class TestPagedObjects(TestLazyObjects):
+    """Test the PagedObjects class"""
+
+    def make_objects(self, load):
+        """Return a PagedObjects of one record per page"""
+        return PagedObjects(load, 2, budget=1, page_size=1)
+
+    def test_pages(self):
+        """Test that records are read back from their pages, within the
+        budget"""
+        for i in range(3):
+            self.assertEqual(self.objects.stored("Thing.{}".format(i)),
+                             {"id": str(i)})
+        self.assertEqual(len(self.objects.pages), 2)
+        self.assertEqual(len(self.objects.resident), 1)
+
+    def test_collect(self):
+        """Test that collect drops the replaced records"""
+        self.objects.page_size = 0
+        for i in range(3):
+            self.objects["Thing.0"] = {"id": "0", "name": str(i)}
+        self.objects.collect()
+        self.assertEqual(self.objects.spilled, self.objects.stored_size)
+        self.assertEqual(self.objects["Thing.0"].name, "2")
+        self.assertEqual(self.objects.stored("Thing.2"), {"id": "2"})
@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+"""
+Contains the TestQueryDocs classes
+"""
+
+import inspect
+import models
+from models.city import City
+from models.engine import query
+from models.place import Place
+from models.state import State
+from models.user import User
+import pycodestyle as pep8
+import unittest
+
+Query = query.Query
+
+
+class TestQueryDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the query module"""
+
+    def test_pep8_conformance_query(self):
+        """Test that models/engine/query.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(["models/engine/query.py"])
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_pep8_conformance_test_query(self):
+        """Test tests/test_models/test_engine/test_query.py conforms to
+        PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(
+            ["tests/test_models/test_engine/test_query.py"]
+        )
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_query_module_docstring(self):
+        """Test for the query.py module docstring"""
+        self.assertIsNot(query.__doc__, None, "query.py needs a docstring")
+        self.assertTrue(len(query.__doc__) >= 1, "query.py needs a docstring")
+
+    def test_query_func_docstrings(self):
+        """Test for the presence of docstrings in query functions"""
+        functions = inspect.getmembers(query, inspect.isfunction)
+        functions += inspect.getmembers(Query, inspect.isfunction)
+        for func in functions:
+            self.assertIsNot(
+                func[1].__doc__, None, "{:s} needs a docstring".format(
+                    func[0])
+            )
+            self.assertTrue(
+                len(func[1].__doc__) >= 1,
+                "{:s} needs a docstring".format(func[0]),
+            )
+
+
+class TestQuery(unittest.TestCase):
+    """Test the Query class and its helpers"""
+
+    def setUp(self):
+        """Make a query whose engine records what it is asked"""
+        self.asked = []
+
+        def fetch(q):
+            """Record q and return nothing"""
+            self.asked.append(q)
+            return []
+
+        self.query = Query(Place, fetch, lambda q: 0)
+
+    def test_parse(self):
+        """Test that conditions are split into attribute and lookup"""
+        self.assertEqual(query.parse("name"), ("name", "eq"))
+        self.assertEqual(query.parse("price_by_night__lte"),
+                         ("price_by_night", "lte"))
+        self.assertEqual(query.parse("city_id__in"), ("city_id", "in"))
+        self.assertEqual(query.parse("__class__"), ("__class__", "eq"))
+
+    def test_matches(self):
+        """Test the lookups, None and values that cannot be compared"""
+        self.assertTrue(query.matches(3, "lte", 3))
+        self.assertFalse(query.matches(4, "lt", 3))
+        self.assertTrue(query.matches("a", "in", ["a", "b"]))
+        self.assertTrue(query.matches(None, "eq", None))
+        self.assertFalse(query.matches(None, "ne", "x"))
+        self.assertFalse(query.matches(None, "in", [None, "x"]))
+        self.assertTrue(query.matches("y", "ne", None))
+        self.assertFalse(query.matches(None, "gt", 0))
+        self.assertFalse(query.matches("3", "gt", 0))
+
+    def test_follows(self):
+        """Test the keyset comparison in ascending and descending order"""
+        ordering = (("price", True), ("id", False))
+        self.assertTrue(query.follows((1, "b"), (2, "a"), ordering))
+        self.assertTrue(query.follows((2, "b"), (2, "a"), ordering))
+        self.assertFalse(query.follows((2, "a"), (2, "a"), ordering))
+        self.assertFalse(query.follows((3, "z"), (2, "a"), ordering))
+        self.assertTrue(query.follows((1, "a"), (None, "a"),
+                                      (("price", False), ("id", False))))
+
+    def test_refine(self):
+        """Test that each method returns a new query"""
+        refined = self.query.filter(city_id="c", number_rooms__gt=2) \
+            .order_by("-price_by_night", "name").limit(5).offset(10)
+        self.assertEqual(self.query.filters, ())
+        self.assertEqual(refined.filters, (("city_id", "eq", "c"),
+                                           ("number_rooms", "gt", 2)))
+        self.assertEqual(refined.ordering, (("price_by_night", True),
+                                            ("name", False)))
+        self.assertEqual((refined.limit_, refined.offset_), (5, 10))
+        self.assertIsNone(self.query.limit_)
+
+    def test_iter_pages(self):
+        """Test that iter walks pages() without a stream of the engine"""
+        self.assertEqual(list(self.query.iter(10)), [])
+        self.assertEqual(self.asked[0].limit_, 10)
+        self.assertEqual(self.asked[0].ordering, (("id", False),))
+
+    def test_first(self):
+        """Test that first fetches a single object"""
+        self.assertIsNone(self.query.first())
+        self.assertEqual(self.asked[0].limit_, 1)
+
+
+class TestQueryStorage(unittest.TestCase):
+    """Test that every storage engine answers queries alike"""
+
+    def setUp(self):
+        """Save Places described as None, x and y"""
+        state = State(name="Queried")
+        city = City(name="Queried", state_id=state.id)
+        user = User(email="query@hbnb.io", password="pwd")
+        self.objs = [state, city, user]
+        self.places = {}
+        for name, description in (("p0", None), ("p1", "x"), ("p2", "y")):
+            place = Place(name=name, city_id=city.id, user_id=user.id,
+                          description=description)
+            self.places[name] = place
+            self.objs.append(place)
+        for obj in self.objs:
+            models.storage.new(obj)
+        models.storage.save()
+
+    def tearDown(self):
+        """Delete the objects saved"""
+        for obj in reversed(self.objs):
+            models.storage.delete(models.storage.get(type(obj), obj.id))
+        models.storage.save()
+        models.storage.close()
+
+    def names(self, **conditions):
+        """Return the sorted names of the Places saved satisfying
+        conditions"""
+        found = models.storage.query(Place).filter(
+            name__in=list(self.places), **conditions).all()
+        return sorted(place.name for place in found)
+
+    def test_null(self):
+        """Test that NULL satisfies only eq None, as in SQL"""
+        self.assertEqual(self.names(description=None), ["p0"])
+        self.assertEqual(self.names(description__ne="x"), ["p2"])
+        self.assertEqual(self.names(description__ne=None), ["p1", "p2"])
+        self.assertEqual(self.names(description__in=[None, "x"]), ["p1"])
+        self.assertEqual(self.names(description__lt="y"), ["p1"])
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""
+Contains the TestQueryCacheDocs and TestQueryCache classes
+"""
+
+import inspect
+from models.engine import query_cache
+import pycodestyle as pep8
+import unittest
+
+QueryCache = query_cache.QueryCache
+
+
+class TestQueryCacheDocs(unittest.TestCase):
+    """Tests to check the documentation and style of QueryCache class"""
+
+    def test_pep8_conformance_query_cache(self):
+        """Test that models/engine/query_cache.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(["models/engine/query_cache.py"])
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_pep8_conformance_test_query_cache(self):
+        """Test tests/test_models/test_engine/test_query_cache.py conforms
+        to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(
+            ["tests/test_models/test_engine/test_query_cache.py"]
+        )
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_query_cache_module_docstring(self):
+        """Test for the query_cache.py module docstring"""
+        self.assertIsNot(query_cache.__doc__, None,
+                         "query_cache.py needs a docstring")
+        self.assertTrue(len(query_cache.__doc__) >= 1,
+                        "query_cache.py needs a docstring")
+
+    def test_query_cache_class_docstring(self):
+        """Test for the QueryCache class docstring"""
+        self.assertIsNot(QueryCache.__doc__, None,
+                         "QueryCache class needs a docstring")
+        self.assertTrue(len(QueryCache.__doc__) >= 1,
+                        "QueryCache class needs a docstring")
+
+    def test_query_cache_func_docstrings(self):
+        """Test for the presence of docstrings in QueryCache methods"""
+        for func in inspect.getmembers(QueryCache, inspect.isfunction):
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestQueryCache(unittest.TestCase):
+    """Test the QueryCache class"""
+
+    def setUp(self):
+        """Make a cache of State results on a clock the tests set"""
+        self.now = 0
+        self.cache = QueryCache(["State"], ttl=10, clock=lambda: self.now)
+
+    def test_hit_and_miss(self):
+        """Test that a stored result is found and counted"""
+        self.assertEqual(self.cache.get("State", ("count",)), (False, None))
+        self.cache.put("State", ("count",), 3, self.cache.generation("State"))
+        self.assertEqual(self.cache.get("State", ("count",)), (True, 3))
+        self.assertTrue(self.cache.caches("State"))
+        self.assertFalse(self.cache.caches("Place"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_ttl(self):
+        """Test that a result expires ttl seconds after it is stored"""
+        self.cache.put("State", ("get", "a"), None, 0)
+        self.now = 9
+        self.assertEqual(self.cache.get("State", ("get", "a")), (True, None))
+        self.now = 10
+        self.assertEqual(self.cache.get("State", ("get", "a")),
+                         (False, None))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_invalidate(self):
+        """Test that invalidating a class drops its results only"""
+        self.cache.put("State", ("all",), [], 0)
+        self.cache.put("Amenity", ("all",), [], 0)
+        self.cache.invalidate("State")
+        self.assertEqual(self.cache.get("State", ("all",)), (False, None))
+        self.assertEqual(self.cache.get("Amenity", ("all",)), (True, []))
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+    def test_put_after_invalidate(self):
+        """Test that a result read before an invalidation is not stored"""
+        generation = self.cache.generation("State")
+        self.cache.invalidate("State")
+        self.cache.put("State", ("count",), 3, generation)
+        self.assertEqual(self.cache.get("State", ("count",)), (False, None))
@@ -0,0 +1,423 @@
+#!/usr/bin/python3
+"""
+Contains the TestSQLiteStorageDocs and TestSQLiteStorage classes
+"""
+
+from datetime import datetime
+import importlib
+import inspect
+import models
+from models.engine import sqlite_storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+import os
+from os import getenv
+import pycodestyle as pep8
+from sqlalchemy import event, exc
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+SQLiteStorage = sqlite_storage.SQLiteStorage
+
+
+class TestSQLiteStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of SQLiteStorage class"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.sls_f = inspect.getmembers(SQLiteStorage, inspect.isfunction)
+
+    def test_pep8_conformance_sqlite_storage(self):
+        """Test that models/engine/sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(["models/engine/sqlite_storage.py"])
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_pep8_conformance_test_sqlite_storage(self):
+        """Test tests/test_models/test_sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(
+            [
+                "tests/test_models/test_engine/\
+test_sqlite_storage.py"
+            ]
+        )
+        self.assertEqual(
+            result.total_errors, 0, "Found code style errors (and warnings)."
+        )
+
+    def test_sqlite_storage_module_docstring(self):
+        """Test for the sqlite_storage.py module docstring"""
+        self.assertIsNot(sqlite_storage.__doc__, None,
+                         "sqlite_storage.py needs a docstring")
+        self.assertTrue(len(sqlite_storage.__doc__) >= 1,
+                        "sqlite_storage.py needs a docstring")
+
+    def test_sqlite_storage_class_docstring(self):
+        """Test for the SQLiteStorage class docstring"""
+        self.assertIsNot(SQLiteStorage.__doc__, None,
+                         "SQLiteStorage class needs a docstring")
+        self.assertTrue(len(SQLiteStorage.__doc__) >= 1,
+                        "SQLiteStorage class needs a docstring")
+
+    def test_sls_func_docstrings(self):
+        """Test for the presence of docstrings in SQLiteStorage methods"""
+        for func in self.sls_f:
+            self.assertIsNot(
+                func[1].__doc__, None, "{:s} method needs a docstring".format(
+                    func[0])
+            )
+            self.assertTrue(
+                len(func[1].__doc__) >= 1,
+                "{:s} method needs a docstring".format(func[0]),
+            )
+
+
+@unittest.skipIf(getenv("HBNB_TYPE_STORAGE") != "sqlite",
+                 "not testing sqlite storage")
+class TestSQLiteStorage(unittest.TestCase):
+    """Test the SQLiteStorage class"""
+
+    def connect(self):
+        """Return a separate connection to the database file"""
+        engine = models.storage._DBStorage__engine
+        return sqlite3.connect(engine.url.database)
+
+    def test_storage_type(self):
+        """Test that sqlite selects SQLiteStorage on mapped models"""
+        self.assertIsInstance(models.storage, SQLiteStorage)
+        self.assertEqual(models.storage_t, "db")
+
+    def test_save_reaches_file(self):
+        """Test that saved and deleted objects are written to the file"""
+        state = State(name="Utah")
+        models.storage.new(state)
+        models.storage.save()
+        with self.connect() as db:
+            rows = db.execute("SELECT name FROM states WHERE id = ?",
+                              (state.id,)).fetchall()
+        self.assertEqual(rows, [("Utah",)])
+        models.storage.delete(state)
+        models.storage.save()
+        with self.connect() as db:
+            rows = db.execute("SELECT name FROM states WHERE id = ?",
+                              (state.id,)).fetchall()
+        self.assertEqual(rows, [])
+
+    def test_indexes(self):
+        """Test that the foreign keys and lookup columns are indexed"""
+        with self.connect() as db:
+            indexes = {row[0] for row in db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for index in ("ix_cities_state_id_name", "ix_places_user_id",
+                      "ix_places_city_id_created_at_id",
+                      "ix_reviews_place_id_created_at_id",
+                      "ix_reviews_user_id", "ix_place_amenity_amenity_id",
+                      "ix_users_email", "ix_states_name",
+                      "ix_amenities_name", "ix_states_created_at_id",
+                      "ix_cities_state_id_created_at_id"):
+            self.assertIn(index, indexes)
+
+    def test_page_indexes_used(self):
+        """Test that the pages of the API collections walk an index in
+        their order rather than sorting the table"""
+        engine = models.storage._DBStorage__engine
+        statements = []
+
+        def record(conn, cursor, statement, parameters, *args):
+            """Record a statement and its parameters"""
+            statements.append((statement, parameters))
+
+        after = (datetime(2017, 3, 25), "id")
+        queries = {
+            "ix_users_created_at_id": models.storage.query(User),
+            "ix_amenities_created_at_id": models.storage.query(Amenity),
+            "ix_cities_state_id_created_at_id":
+                models.storage.query(City).filter(state_id="s"),
+            "ix_places_city_id_created_at_id":
+                models.storage.query(Place).filter(city_id="c"),
+            "ix_reviews_place_id_created_at_id":
+                models.storage.query(Review).filter(place_id="p"),
+        }
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            for query in queries.values():
+                query.order_by("created_at", "id").after(*after) \
+                    .limit(3).all()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        with self.connect() as db:
+            for index, (statement, parameters) in zip(queries, statements):
+                plan = " ".join(str(row[-1]) for row in db.execute(
+                    "EXPLAIN QUERY PLAN " + statement, parameters))
+                self.assertIn("USING INDEX " + index, plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_indexes_used(self):
+        """Test that the relationship loads search their indexes"""
+        with self.connect() as db:
+            plans = [" ".join(str(row[-1]) for row in db.execute(
+                "EXPLAIN QUERY PLAN " + sql, ("x",))) for sql in (
+                "SELECT * FROM cities WHERE state_id = ? ORDER BY name",
+                "SELECT * FROM places WHERE city_id = ?",
+                "SELECT * FROM reviews WHERE user_id = ?",
+                "SELECT * FROM users WHERE email = ?")]
+        for plan in plans:
+            self.assertIn("USING INDEX", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_get_count(self):
+        """Test get and count against the database file"""
+        state = State(name="Nevada")
+        models.storage.new(state)
+        city = City(name="Reno", state_id=state.id)
+        models.storage.new(city)
+        models.storage.save()
+        self.assertIs(models.storage.get(City, city.id), city)
+        self.assertIsNone(models.storage.get(City, "fake_id"))
+        self.assertEqual(models.storage.count(City),
+                         len(models.storage.all(City)))
+        self.assertEqual(models.storage.count(),
+                         len(models.storage.all()))
+
+    def test_transaction(self):
+        """Test that a transaction commits its changes when it ends and
+        rolls them back if it raises"""
+        state = State(name="Idaho")
+        with models.storage.transaction():
+            models.storage.new(state)
+            models.storage.save()
+            with self.connect() as db:
+                rows = db.execute("SELECT name FROM states WHERE id = ?",
+                                  (state.id,)).fetchall()
+            self.assertEqual(rows, [])
+        with self.connect() as db:
+            rows = db.execute("SELECT name FROM states WHERE id = ?",
+                              (state.id,)).fetchall()
+        self.assertEqual(rows, [("Idaho",)])
+        other = State(name="Maine")
+        with self.assertRaises(ValueError):
+            with models.storage.transaction():
+                state.name = "Iowa"
+                models.storage.new(other)
+                raise ValueError()
+        self.assertEqual(state.name, "Idaho")
+        self.assertIsNone(models.storage.get(State, other.id))
+
+    def test_query(self):
+        """Test that queries are compiled to SQL filters, ordering and
+        limits"""
+        state = State(name="Texas")
+        city = City(name="Austin", state_id=state.id)
+        user = User(email="query@hbnb.io", password="pwd")
+        for obj in (state, city, user):
+            models.storage.new(obj)
+        for i in range(5):
+            models.storage.new(Place(name="place_{}".format(i),
+                                     city_id=city.id, user_id=user.id,
+                                     price_by_night=100 * i))
+        models.storage.save()
+        query = models.storage.query(Place).filter(city_id=city.id)
+        self.assertEqual(query.count(), 5)
+        cheap = query.filter(price_by_night__lte=200)
+        self.assertEqual(sorted(place.name for place in cheap),
+                         ["place_0", "place_1", "place_2"])
+        ordered = query.order_by("-price_by_night").limit(2).offset(1)
+        self.assertEqual([place.name for place in ordered],
+                         ["place_3", "place_2"])
+        self.assertEqual(
+            query.filter(name__in=["place_4", "x"]).first().name, "place_4")
+        with self.assertRaises(ValueError):
+            query.filter(unknown=1).all()
+        after = query.order_by("-price_by_night", "id").after(300, "z")
+        self.assertEqual([place.name for place in after],
+                         ["place_2", "place_1", "place_0"])
+        pages = list(query.order_by("created_at").pages(2))
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(len({place.id for page in pages for place in page}),
+                         5)
+
+    def count_queries(self, walk, engine=None):
+        """Return the number of SQL statements walk() runs on engine, that
+        of models.storage by default"""
+        if engine is None:
+            engine = models.storage._DBStorage__engine
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            """Count a statement"""
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            walk()
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        return len(statements)
+
+    def seed(self, count):
+        """Save count States with two Cities of two Places each, and
+        return the ids of the States"""
+        user = User(email="load@hbnb.io", password="pwd")
+        models.storage.new(user)
+        ids = []
+        for i in range(count):
+            state = State(name="state_{}".format(i))
+            models.storage.new(state)
+            ids.append(state.id)
+            for j in range(2):
+                city = City(name="city_{}".format(j), state_id=state.id)
+                models.storage.new(city)
+                for k in range(2):
+                    models.storage.new(Place(name="place", city_id=city.id,
+                                             user_id=user.id))
+        models.storage.save()
+        # start from an empty session, as a request does
+        models.storage.close()
+        return ids
+
+    def test_loading_profiles(self):
+        """Test that the relationships loaded with the objects cost one
+        query each, however many objects there are"""
+        for count in (2, 6):
+            ids = self.seed(count)
+
+            def walk(*load):
+                """Walk the Places of the Cities of the States"""
+                query = models.storage.query(State).filter(id__in=ids)
+                for state in query.load(*load):
+                    for city in state.cities:
+                        city.places
+
+            self.assertEqual(self.count_queries(
+                lambda: walk("cities.places")), 3)
+            models.storage.close()
+            self.assertEqual(self.count_queries(walk), 1 + 3 * count)
+            models.storage.close()
+            states = self.count_queries(lambda: [
+                state.cities for state in models.storage.all(
+                    State, load=["cities"]).values()])
+            self.assertEqual(states, 2)
+            models.storage.close()
+        with self.assertRaises(ValueError):
+            models.storage.all(State, load=["unknown"])
+
+    def test_page_queries(self):
+        """Test that the cities_by_states page costs two queries, and that
+        the pages of an ordering on a nullable column hold every row"""
+        module = importlib.import_module("web_flask.8-cities_by_states")
+        client = module.app.test_client()
+        for count in (2, 6):
+            self.seed(count)
+            queries = self.count_queries(
+                lambda: client.get("/cities_by_states").close())
+            self.assertEqual(queries, 2)
+        city = models.storage.query(City).first()
+        user = models.storage.query(User).first()
+        names = ["null_{}".format(i) for i in range(3)]
+        names += ["described_{}".format(i) for i in range(3)]
+        for i, name in enumerate(names):
+            models.storage.new(Place(
+                name=name, city_id=city.id, user_id=user.id,
+                description=None if i < 3 else "d{}".format(i % 2)))
+        models.storage.save()
+        query = models.storage.query(Place).filter(name__in=names)
+        for ordering in ("description", "-description"):
+            pages = list(query.order_by(ordering).pages(2))
+            self.assertEqual([len(page) for page in pages], [2, 2, 2])
+            self.assertEqual(sorted(place.name for page in pages
+                                    for place in page), sorted(names))
+
+    def test_pool(self):
+        """Test the pool options, the warm-up and the pool statistics"""
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.dict(os.environ, {
+                    "HBNB_SQLITE_PATH": os.path.join(tmp, "pool.db"),
+                    "HBNB_DB_POOL_SIZE": "3", "HBNB_DB_MAX_OVERFLOW": "1",
+                    "HBNB_DB_POOL_TIMEOUT": "0.1",
+                    "HBNB_DB_POOL_WARMUP": "2"}):
+                storage = SQLiteStorage()
+            engine = storage._DBStorage__engine
+            try:
+                self.assertEqual(storage.pool_stats(), {
+                    "pool": "QueuePool", "size": 3, "checkedin": 2,
+                    "checkedout": 0, "overflow": -1})
+                connections = [engine.connect() for i in range(4)]
+                stats = storage.pool_stats()
+                self.assertEqual((stats["checkedout"], stats["overflow"]),
+                                 (4, 1))
+                with self.assertRaises(exc.TimeoutError):
+                    engine.connect()
+                for connection in connections:
+                    connection.close()
+                self.assertEqual(storage.pool_stats()["checkedin"], 3)
+            finally:
+                engine.dispose()
+
+    def test_query_cache(self):
+        """Test that get, all and count are read from the cache until a
+        commit changes their class, and never hide the session changes"""
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.dict(os.environ, {
+                    "HBNB_SQLITE_PATH": os.path.join(tmp, "cache.db"),
+                    "HBNB_DB_CACHE": "State"}):
+                storage = SQLiteStorage()
+            storage.reload()
+            self.addCleanup(storage._DBStorage__engine.dispose)
+            self.addCleanup(storage.close)
+            state = State(name="Utah")
+            storage.new(state)
+            storage.save()
+            storage.close()
+
+            def read():
+                """Read the States through the cache"""
+                found = storage.get(State, state.id)
+                storage.all(State)
+                storage.count(State)
+                storage.close()
+                return found
+
+            count = self.count_queries
+            engine = storage._DBStorage__engine
+            self.assertGreater(count(read, engine), 0)
+            self.assertEqual(count(read, engine), 0)
+            self.assertEqual(read().name, "Utah")
+            self.assertEqual(storage.get(State, state.id).cities, [])
+            storage.close()
+            stats = storage.cache_stats()
+            self.assertEqual((stats["hits"], stats["misses"]), (7, 3))
+            storage.new(State(name="Iowa"))
+            self.assertEqual(storage.count(State), 2)
+            storage.save()
+            storage.close()
+            self.assertEqual(storage.count(State), 2)
+            self.assertEqual(storage.count_all()["State"], 2)
+            found = storage.get(State, state.id)
+            found.name = "Ohio"
+            self.assertEqual(storage.all(State)["State." + state.id].name,
+                             "Ohio")
+            storage.save()
+            storage.close()
+            self.assertEqual(read().name, "Ohio")
+            self.assertEqual(storage.cache_stats()["invalidations"], 3)
+
+    def test_iter(self):
+        """Test that iter walks a class in batches, and every class"""
+        ids = self.seed(3)
+        walked = [obj.id for obj in models.storage.iter(State, 2)]
+        self.assertEqual(len(walked), models.storage.count(State))
+        self.assertTrue(set(ids) <= set(walked))
+        self.assertEqual(len(list(models.storage.iter(batch_size=5))),
+                         models.storage.count())
+        query = models.storage.query(City).filter(state_id__in=ids)
+        self.assertEqual(len(list(query.iter(4))), 6)
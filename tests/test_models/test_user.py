@@ -103,6 +103,24 @@ class TestUser(unittest.TestCase):
         else:
             self.assertEqual(user.last_name, "")
 
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_places_and_reviews(self):
+        """Test that places and reviews list what the user owns"""
+        from models.place import Place
+        from models.review import Review
+        user = User()
+        place = Place(user_id=user.id)
+        review = Review(user_id=user.id, place_id=place.id)
+        models.storage.new(place)
+        models.storage.new(review)
+        self.assertEqual(user.places, [place])
+        self.assertEqual(user.reviews, [review])
+        review.user_id = "another_user"
+        self.assertEqual(user.reviews, [])
+        models.storage.delete(place)
+        models.storage.delete(review)
+        self.assertEqual(user.places, [])
+
     def test_to_dict_creates_dict(self):
         """test to_dict method creates a dictionary with proper attrs"""
         u = User()